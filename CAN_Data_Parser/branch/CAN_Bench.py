@@ -0,0 +1,261 @@
+#!/usr/bin/python
+
+################################################################################
+##  Synthetic capture generator and stage benchmark for CAN_Data_Parser
+##  generate: writes a log in the exact logger line format covering every catalog ID
+##  bench: times reading, parsing, decoding and every sink separately
+################################################################################
+
+from __future__ import print_function
+
+import argparse
+import heapq
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+import CAN_Data_Parser as parser
+from CAN_Data_Parser import DECODE_PLANS, FrameParser, decode, np, mysql, read_lines
+
+timer = getattr(time, 'perf_counter', time.time)
+
+####################################################################################
+#Generator: every ID sends at its own rate with a random phase and a little jitter;
+#signals random-walk in raw units so consecutive frames look like the real pack, and
+#flags and enums only flip now and then
+####################################################################################
+#IDs outside the catalog that the real captures also carry
+UNKNOWN_IDS = (0x18F, 0x502, 0x6A0, 0x7FF)
+
+#frames per second of an ID by default: cell groups report often, tester requests rarely
+def default_rate(dataGroup):
+    if dataGroup.startswith('Tester'):
+        return 0.5
+    if 'Cell' in dataGroup or dataGroup.startswith('USU') or dataGroup.startswith('BECM'):
+        return 10.0
+    return 20.0
+
+#ID -> frames per second from the defaults and GROUP=HZ or hex ID=HZ overrides
+def id_rates(overrides, unknownRate):
+    rates = dict((canId, default_rate(group)) for canId, (group, signals) in DECODE_PLANS.items())
+    for canId in UNKNOWN_IDS:
+        rates[canId] = unknownRate
+    for override in overrides or ():
+        key, hz = override.split('=')
+        matched = [canId for canId, (group, signals) in DECODE_PLANS.items() if group == key]
+        rates.update((canId, float(hz)) for canId in (matched or [int(key, 16)]))
+    return dict((canId, hz) for canId, hz in rates.items() if hz > 0)
+
+#random-walking raw fields of one ID packed into its 64-bit payload
+class PayloadWalk(object):
+    def __init__(self, canId, rng):
+        self.rng = rng
+        self.fields = []
+        if canId in DECODE_PLANS:
+            for name, shift, mask, scale, offset in DECODE_PLANS[canId][1]:
+                self.fields.append([shift, mask, rng.randint(mask // 4, mask - mask // 4), mask.bit_length() <= 3])
+        else:
+            self.fields.append([0, (1 << 64) - 1, 0, False])
+
+    def next(self):
+        payload = 0
+        for field in self.fields:
+            shift, mask, raw, flag = field
+            if flag:
+                if self.rng.random() < 0.001:
+                    raw = self.rng.randint(0, mask)
+            elif mask == (1 << 64) - 1:
+                raw = self.rng.getrandbits(64)
+            else:
+                raw = min(max(raw + self.rng.choice((-2, -1, 0, 0, 0, 1, 2)), 0), mask)
+            field[2] = raw
+            payload |= raw << shift
+        return payload & ((1 << 64) - 1)
+
+#logger line of one frame: 'M/D/YYYY HH:MM:SS.mmm: ID B0 B1 B2 B3 B4 B5 B6 B7 \r\n'
+def format_line(stamp, canId, payload):
+    return '%d/%d/%d %s.%03d: %X %s \r\n' % (stamp.month, stamp.day, stamp.year, stamp.strftime('%H:%M:%S'),
+                                            stamp.microsecond // 1000, canId,
+                                            ' '.join('%02X' % ((payload >> shift) & 0xFF) for shift in range(56, -8, -8)))
+
+#yields the log lines of duration seconds from start in time order
+def generate_lines(start, duration, rates, seed=0):
+    rng = random.Random(seed)
+    walks = dict((canId, PayloadWalk(canId, rng)) for canId in rates)
+    queue = [(rng.random()/hz, canId) for canId, hz in rates.items()]
+    heapq.heapify(queue)
+    while queue:
+        offset, canId = heapq.heappop(queue)
+        if offset >= duration:
+            continue
+        yield format_line(start + timedelta(seconds=int(offset), microseconds=int(offset % 1 * 1000) * 1000),
+                          canId, walks[canId].next())
+        period = 1.0/rates[canId]
+        heapq.heappush(queue, (offset + period * rng.uniform(0.98, 1.02), canId))
+
+#writes the lines to path, zipped as one member when path ends in .zip like the archives
+def write_log(path, lines):
+    if not path.endswith('.zip'):
+        with open(path, 'w') as outfile:
+            outfile.writelines(lines)
+        return
+    txtPath = path[:-4] + '.txt'
+    with open(txtPath, 'w') as outfile:
+        outfile.writelines(lines)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipout:
+        zipout.write(txtPath, os.path.basename(txtPath))
+    os.remove(txtPath)
+####################################################################################
+
+#Benchmark: each stage runs over the whole log on its own and reports frames/s and
+#rows/s; the sinks are fed through Pipeline.send exactly as an ingest would
+####################################################################################
+#raw bytes of a log file, or of the first member of a zip archive
+def open_log(path):
+    if zipfile.is_zipfile(path):
+        zipin = zipfile.ZipFile(path, 'r')
+        return zipin.open([info for info in zipin.infolist() if not info.filename.endswith('/')][0], 'r')
+    return open(path, 'rb')
+
+def stage(name, frames, rows, seconds):
+    return name, {'frames': frames, 'rows': rows, 'seconds': round(seconds, 4),
+                  'frames_per_s': round(frames/seconds if seconds else 0.0, 1),
+                  'rows_per_s': round(rows/seconds if seconds else 0.0, 1)}
+
+#sink name -> writer factory over a scratch directory, MySQL ones only when asked for
+def bench_sinks(scratch, withMySQL):
+    sinks = [
+        ('sqlite', lambda: parser.SQLiteWriter(os.path.join(scratch, 'bench.db'))),
+        ('csv', lambda: parser.CSVWriter(os.path.join(scratch, 'bench.csv'))),
+    ]
+    if np is not None:
+        sinks.append(('npz', lambda: parser.NPZWriter(os.path.join(scratch, 'bench_npz'))))
+    if withMySQL:
+        sinks.append(('insert', lambda: parser.SQLWriter(MYSQL_BENCH[1], table='can_data_bench')))
+        sinks.append(('load', lambda: parser.LoadDataWriter(MYSQL_BENCH[1], table='can_data_bench')))
+    return sinks
+
+#connection and cursor of the MySQL sinks; their rows go to a scratch copy of can_data
+MYSQL_BENCH = [None, None]
+
+def run_bench(path, withMySQL):
+    results = []
+    started = timer()
+    with open_log(path) as infile:
+        lines = list(read_lines(infile))
+    results.append(stage('read', len(lines), 0, timer() - started))
+
+    frameParser = FrameParser()
+    parse = frameParser.parse
+    started = timer()
+    frames = [frame for frame in (parse(line) for line in lines) if frame is not None]
+    results.append(stage('parse', len(frames), 0, timer() - started))
+
+    started = timer()
+    decoded = [(timestamp,) + decode(canId, payload) for timestamp, canId, payload in frames]
+    rows = sum(len(signals) for timestamp, dataGroup, signals in decoded)
+    results.append(stage('decode', len(frames), rows, timer() - started))
+
+    if np is not None:
+        started = timer()
+        columns = parser.decode_columns(*parser.frames2columns(frames))
+        results.append(stage('decode_numpy', len(frames), sum(len(column[2]) for column in columns), timer() - started))
+
+    scratch = tempfile.mkdtemp(prefix='can_bench_')
+    if withMySQL:
+        MYSQL_BENCH[0] = parser.connect(True)
+        MYSQL_BENCH[1] = MYSQL_BENCH[0].cursor()
+        #a copy of the table the text schema writes to, can_data itself may be the encoded view
+        MYSQL_BENCH[1].execute('CREATE TABLE IF NOT EXISTS can_data_bench LIKE %s' % parser.text_table(MYSQL_BENCH[1]))
+        #the writers tag their rows with a load, which a table from before --setup has no column for
+        MYSQL_BENCH[1].execute('SHOW COLUMNS FROM can_data_bench')
+        if 'load_id' not in [row[0] for row in MYSQL_BENCH[1].fetchall()]:
+            MYSQL_BENCH[1].execute('ALTER TABLE can_data_bench ADD COLUMN load_id INT UNSIGNED')
+    try:
+        for name, make in bench_sinks(scratch, withMySQL):
+            writer = make()
+            send = parser.Pipeline(writer).send
+            #closing writes the npz files and the last batch of the others, so it is timed too
+            started = timer()
+            for frame in decoded:
+                send(*frame)
+            writer.close()
+            results.append(stage('sink_' + name, len(decoded), rows, timer() - started))
+            if withMySQL and name in ('insert', 'load'):
+                MYSQL_BENCH[0].rollback()
+    finally:
+        if MYSQL_BENCH[0] is not None:
+            MYSQL_BENCH[1].execute('DROP TABLE can_data_bench')
+            MYSQL_BENCH[0].close()
+        shutil.rmtree(scratch)
+    return results
+
+#stages whose frames/s fell more than tolerance below the baseline report
+def regressions(results, baseline, tolerance):
+    slower = []
+    for name, result in results:
+        before = baseline.get(name)
+        if before and result['frames_per_s'] < before['frames_per_s'] * (1 - tolerance):
+            slower.append('%s %.0f frames/s, baseline %.0f' % (name, result['frames_per_s'], before['frames_per_s']))
+    return slower
+####################################################################################
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description='Generate synthetic CAN logs and benchmark the CAN_Data_Parser stages')
+    commands = argp.add_subparsers(dest='command')
+    gen = commands.add_parser('generate', help='write a synthetic log covering every catalog ID')
+    gen.add_argument('output', help='log file to write, zipped as one member when it ends in .zip')
+    gen.add_argument('--duration', type=float, default=60.0, help='seconds of traffic (default 60)')
+    gen.add_argument('--start', default='2016-01-15 13:00:00', help='time of the first frame (default 2016-01-15 13:00:00)')
+    gen.add_argument('--rate', action='append', metavar='GROUP=HZ',
+                     help='frames/s of every ID of a decoder group or of one hex ID, repeatable '
+                          '(defaults: cell groups 10, tester requests 0.5, others 20)')
+    gen.add_argument('--unknown-rate', type=float, default=1.0, help='frames/s of each ID outside the catalog (default 1)')
+    gen.add_argument('--seed', type=int, default=0, help='random seed (default 0)')
+    bench = commands.add_parser('bench', help='time every pipeline stage on a log')
+    bench.add_argument('log', nargs='?', help='log file or zip archive (default a generated 60 s log)')
+    bench.add_argument('--mysql', action='store_true', help='also time the insert and load sinks into a scratch can_data_bench table')
+    bench.add_argument('--json', help='write the results to this file')
+    bench.add_argument('--baseline', help='results of an earlier run; exit 1 if a stage got slower')
+    bench.add_argument('--tolerance', type=float, default=0.2, help='frames/s drop allowed against the baseline (default 0.2)')
+    args = argp.parse_args()
+    if args.command is None:
+        argp.error('choose generate or bench')
+
+    if args.command == 'generate':
+        try:
+            rates = id_rates(args.rate, args.unknown_rate)
+        except ValueError:
+            argp.error('--rate takes a decoder group or hex ID and frames/s, e.g. CellVoltageGroup=50 or 140=5')
+        start = datetime.strptime(args.start, '%Y-%m-%d %H:%M:%S')
+        write_log(args.output, generate_lines(start, args.duration, rates, args.seed))
+        sys.exit(0)
+
+    if args.mysql and mysql is None:
+        argp.error('--mysql needs mysql.connector installed')
+    path = args.log
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='can_bench_'), 'synthetic.zip')
+        write_log(path, generate_lines(datetime(2016, 1, 15, 13), 60.0, id_rates(None, 1.0)))
+    results = run_bench(path, args.mysql)
+    if args.log is None:
+        shutil.rmtree(os.path.dirname(path))
+    for name, result in results:
+        print('%-14s %8d frames %9d rows %8.3fs %10.0f frames/s %10.0f rows/s' % (
+            name, result['frames'], result['rows'], result['seconds'], result['frames_per_s'], result['rows_per_s']),
+            file=sys.stderr)
+    if args.json:
+        with open(args.json, 'w') as outfile:
+            json.dump(dict(results), outfile, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as infile:
+            slower = regressions(results, json.load(infile), args.tolerance)
+        for line in slower:
+            print('regression: ' + line, file=sys.stderr)
+        sys.exit(1 if slower else 0)
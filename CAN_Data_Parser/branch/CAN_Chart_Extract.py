@@ -0,0 +1,231 @@
+#!/usr/bin/python
+
+################################################################################
+##  Chart extractor for data loaded by CAN_Data_Parser
+##  Streams one signal's stored samples for a time window and reduces them to a
+##  fixed number of points with min/max per pixel or largest-triangle-three-buckets
+################################################################################
+
+from __future__ import print_function
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from itertools import chain, groupby, islice
+
+from CAN_Data_Parser import DECODE_PLANS, WIDE_PREFIX, connect, datetime2us, load_signal, np, text_table, us2datetime
+
+#signal name -> decoder group, names are unique across the catalog
+SIGNAL_GROUPS = dict((name, group) for group, signals in DECODE_PLANS.values()
+                     for name, shift, mask, scale, offset in signals)
+
+#epoch microseconds of a stored timestamp: a datetime from MySQL or ISO text from SQLite
+def stamp2us(stamp):
+    if not isinstance(stamp, datetime):
+        stamp = datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S.%f' if '.' in stamp else '%Y-%m-%d %H:%M:%S')
+    return datetime2us(stamp)
+
+####################################################################################
+#Sources: each yields the (epoch microseconds, value) samples of one signal inside
+#[start, end] in time order without holding them all, and finds the stored time range
+#of a signal when the window is left open
+####################################################################################
+#MySQL text, encoded or wide tables; every query filters each table it reads on its own,
+#so the UNION view over can_samples and can_data_text is never materialized, and the
+#text schema is read like the encoded one once can_data is that view
+class MySQLSource(object):
+    PARAM = '%s'
+
+    def __init__(self, schema='text'):
+        self.conn = connect()
+        self.schema = schema
+        if schema != 'wide':
+            curs = self.conn.cursor()
+            self.textTable = text_table(curs)
+            curs.close()
+            if self.textTable == 'can_data_text':
+                self.schema = 'encoded'
+            self.textColumns = self.columns(self.textTable)
+
+    #column names of a text-layout table in (group, signal name, time, value) order; the
+    #website's can_data names them its own way, so they are read as setup_encoded reads them
+    def columns(self, table):
+        curs = self.conn.cursor()
+        curs.execute('SHOW COLUMNS FROM %s' % table)
+        names = ['`%s`' % row[0] for row in curs.fetchall()]
+        curs.close()
+        return names
+
+    #one (time column, value column, FROM ... WHERE ..., params) per table holding samples of name
+    def tables(self, name):
+        if self.schema == 'wide':
+            return [('ts', '`%s`' % name, 'FROM %s%s WHERE `%s` IS NOT NULL' % (WIDE_PREFIX, SIGNAL_GROUPS[name], name), ())]
+        tables = []
+        if self.schema == 'encoded':
+            tables.append(('d.ts', 'd.value', 'FROM can_samples d JOIN signals s ON s.signal_id = d.signal_id '
+                           'WHERE s.data_group = %s AND s.name = %s' % (self.PARAM, self.PARAM), (SIGNAL_GROUPS[name], name)))
+        group, key, ts, value = self.textColumns[:4]
+        tables.append((ts, value, 'FROM %s WHERE %s = %s' % (self.textTable, key, self.PARAM), (name,)))
+        return tables
+
+    def bounds(self, name):
+        curs = self.conn.cursor()
+        found = []
+        for ts, value, source, params in self.tables(name):
+            curs.execute('SELECT MIN(%s), MAX(%s) %s' % (ts, ts, source), params)
+            low, high = curs.fetchall()[0]
+            if low is not None:
+                found.append((stamp2us(low), stamp2us(high)))
+        curs.close()
+        return (min(low for low, high in found), max(high for low, high in found)) if found else None
+
+    def samples(self, name, start, end):
+        curs = self.conn.cursor()
+        window = (us2datetime(start), us2datetime(end))
+        queries, params = [], ()
+        for ts, value, source, tableParams in self.tables(name):
+            queries.append('SELECT %s, %s %s AND %s BETWEEN %s AND %s' % (ts, value, source, ts, self.PARAM, self.PARAM))
+            params += tableParams + window
+        curs.execute('%s ORDER BY 1' % ' UNION ALL '.join(queries), params)
+        for stamp, value in curs:
+            yield stamp2us(stamp), float(value)
+        curs.close()
+
+    def close(self):
+        self.conn.close()
+
+#can_data of the SQLite sink
+class SQLiteSource(MySQLSource):
+    PARAM = '?'
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.schema = 'text'
+        self.textTable = 'can_data'
+        self.textColumns = self.columns(self.textTable)
+
+    def columns(self, table):
+        return ['"%s"' % row[1] for row in self.conn.execute('PRAGMA table_info(%s)' % table)]
+
+#a session directory of the npz sink, where a signal is two arrays already in time order
+class NPZSource(object):
+    def __init__(self, path):
+        self.path = path
+
+    def bounds(self, name):
+        stamps, values = load_signal(self.path, SIGNAL_GROUPS[name], name)
+        return (int(stamps[0]), int(stamps[-1])) if len(stamps) else None
+
+    def samples(self, name, start, end):
+        stamps, values = load_signal(self.path, SIGNAL_GROUPS[name], name)
+        first = np.searchsorted(stamps, start, side='left')
+        last = np.searchsorted(stamps, end, side='right')
+        return zip(stamps[first:last].tolist(), values[first:last].astype(np.float64).tolist())
+
+    def close(self):
+        pass
+####################################################################################
+
+#Downsampling: both reducers bucket the window by time, so the samples are consumed as a
+#stream and at most two buckets of samples are held
+####################################################################################
+#groups a time-ordered stream into lists of samples per non-empty bucket of width
+def time_buckets(samples, start, width, count):
+    for index, bucket in groupby(samples, lambda sample: min(int((sample[0] - start)/width), count - 1)):
+        yield list(bucket)
+
+#min and max sample of every one of points/2 pixel columns, in time order
+def minmax(samples, start, end, points):
+    count = max(points // 2, 1)
+    reduced = []
+    for bucket in time_buckets(samples, start, max(end - start, 1)/float(count), count):
+        low = min(bucket, key=lambda sample: sample[1])
+        high = max(bucket, key=lambda sample: sample[1])
+        reduced.extend(sorted(set((low, high))))
+    return reduced
+
+#largest-triangle-three-buckets: the first and last samples are kept and every bucket in
+#between keeps the sample spanning the largest triangle with the sample kept before it
+#and the mean of the next bucket; a window of at most points samples is kept whole
+def lttb(samples, start, end, points):
+    samples = iter(samples)
+    head = list(islice(samples, points + 1))
+    if len(head) <= points:
+        return head
+    samples = chain(head, samples)
+    first = next(samples)
+    count = max(points - 2, 1)
+    buckets = time_buckets(samples, start, max(end - start, 1)/float(count), count)
+    reduced = [first]
+    current = next(buckets, None)
+    while current is not None:
+        following = next(buckets, None)
+        if following is None:
+            final = current.pop()
+            target = final
+        else:
+            target = (sum(t for t, v in following)/float(len(following)),
+                      sum(v for t, v in following)/float(len(following)))
+        if current:
+            (at, av), (ct, cv) = reduced[-1], target
+            reduced.append(max(current, key=lambda sample: abs((at - ct)*(sample[1] - av) - (at - sample[0])*(cv - av))))
+        if following is None:
+            reduced.append(final)
+        current = following
+    return reduced
+
+REDUCERS = {'minmax': minmax, 'lttb': lttb}
+
+#'YYYY-MM-DD HH:MM:SS[.ffffff]' as epoch microseconds
+def parse_time(text):
+    try:
+        return stamp2us(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected YYYY-MM-DD HH:MM:SS[.ffffff], got %s' % text)
+####################################################################################
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description='Extract chart-sized series of stored CAN signals as JSON')
+    argp.add_argument('names', nargs='+', help='signal names, e.g. BattTrac_I_Actl HV_Cycler_Voltage_Actl')
+    argp.add_argument('--source', choices=('mysql', 'sqlite', 'npz'), default='mysql',
+                      help='read the MySQL tables, a --sink sqlite database or a --sink npz session directory (default mysql)')
+    argp.add_argument('--input', help='SQLite database file or npz session directory')
+    argp.add_argument('--schema', choices=('text', 'encoded', 'wide'), default='text',
+                      help='MySQL layout to read; text reads can_data, or the encoded tables once can_data is their view (default text)')
+    argp.add_argument('--start', type=parse_time, help='window start, YYYY-MM-DD HH:MM:SS[.ffffff] (default first sample)')
+    argp.add_argument('--end', type=parse_time, help='window end (default last sample)')
+    argp.add_argument('--points', type=int, default=1000, help='max points per signal (default 1000)')
+    argp.add_argument('--method', choices=sorted(REDUCERS), default='lttb',
+                      help='largest-triangle-three-buckets or min/max per pixel column (default lttb)')
+    args = argp.parse_args()
+    unknown = [name for name in args.names if name not in SIGNAL_GROUPS]
+    if unknown:
+        argp.error('unknown signal %s' % ', '.join(unknown))
+    if args.source != 'mysql' and not args.input:
+        argp.error('--source %s needs --input' % args.source)
+    if args.source == 'npz' and np is None:
+        argp.error('--source npz needs numpy installed')
+    if args.points < 3:
+        argp.error('--points must be at least 3')
+
+    if args.source == 'mysql':
+        source = MySQLSource(args.schema)
+    elif args.source == 'sqlite':
+        source = SQLiteSource(args.input)
+    else:
+        source = NPZSource(args.input)
+    series = {}
+    for name in args.names:
+        start, end = args.start, args.end
+        if start is None or end is None:
+            bounds = source.bounds(name) or (0, 0)
+            start = bounds[0] if start is None else start
+            end = bounds[1] if end is None else end
+        points = REDUCERS[args.method](source.samples(name, start, end), start, end, args.points)
+        #epoch milliseconds, as JavaScript charts take them
+        series[name] = {'group': SIGNAL_GROUPS[name], 'points': [[t/1000.0, v] for t, v in points]}
+    source.close()
+    json.dump(series, sys.stdout, separators=(',', ':'))
+    print()
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+
+################################################################################
+##  End-to-end check of CAN_Data_Parser loads on a generated log
+##  engines: the rows and NumPy engines, serial and with --workers, store the same
+##  rows through the SQLite and CSV sinks
+##  resume: a SQLite load killed after its first committed batch and run again
+##  stores the same rows as a clean load
+################################################################################
+
+from __future__ import print_function
+
+import argparse
+import glob
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from CAN_Bench import generate_lines, id_rates, write_log
+from CAN_Data_Parser import np
+
+PARSER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CAN_Data_Parser.py')
+
+####################################################################################
+#Loads: every load runs the parser as its own process, exactly as from the command
+#line, and its output is reduced to the sorted stored rows so loads compare whatever
+#order their batches were written in
+####################################################################################
+#name and parser options of every engine variant, the first is the reference of the others
+def engine_variants(workers):
+    variants = [('rows', ['--engine', 'rows'])]
+    if np is not None:
+        variants.append(('numpy', ['--engine', 'numpy']))
+    if workers > 1:
+        variants.extend((name + ' --workers %d' % workers, options + ['--workers', str(workers)])
+                        for name, options in list(variants))
+    return variants
+
+def parser_command(archive, sink, output, options):
+    return [sys.executable, PARSER, archive, '--sink', sink, '--output', output] + options
+
+#runs one load to its end, raising with its stderr when it fails
+def load(archive, sink, output, options):
+    proc = subprocess.Popen(parser_command(archive, sink, output, options), stderr=subprocess.PIPE)
+    errors = proc.communicate()[1]
+    if proc.returncode != 0:
+        raise RuntimeError('%s load %s failed:\n%s' % (sink, ' '.join(options), errors.decode('utf-8', 'replace')))
+
+#sorted rows of can_data of a SQLite sink without their load, which differs between loads
+def sqlite_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(conn.execute('SELECT data_group, name, ts, value FROM can_data'))
+    finally:
+        conn.close()
+
+#sorted lines of every CSV file of a CSV sink, by file name
+def csv_rows(directory):
+    rows = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        with open(path) as infile:
+            rows[os.path.basename(path)] = sorted(infile)
+    return rows
+
+SINK_ROWS = {'sqlite': sqlite_rows, 'csv': csv_rows}
+
+#output path of a load into scratch, a database file or a directory by sink
+def sink_output(scratch, sink, name):
+    return os.path.join(scratch, '%s_%s%s' % (sink, name.replace(' ', '').replace('-', ''), '.db' if sink == 'sqlite' else ''))
+
+#rows of frames stored by a SQLite sink so far, 0 before its table exists
+def stored_rows(path):
+    try:
+        conn = sqlite3.connect(path, timeout=60)
+        try:
+            return conn.execute('SELECT COUNT(*) FROM can_data').fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+####################################################################################
+
+#Checks: each returns a list of failures, empty when it passed
+####################################################################################
+def check_engines(archive, scratch, workers):
+    failures = []
+    for sink in ('sqlite', 'csv'):
+        reference = None
+        for name, options in engine_variants(workers):
+            output = sink_output(scratch, sink, name)
+            load(archive, sink, output, options)
+            rows = SINK_ROWS[sink](output)
+            if reference is None:
+                reference = name, rows
+                if not rows:
+                    failures.append('%s %s stored no rows' % (sink, name))
+            elif rows != reference[1]:
+                failures.append('%s %s differs from %s' % (sink, name, reference[0]))
+            if sink == 'csv':
+                print('engines: csv %s, %d lines in %d files' % (name, sum(map(len, rows.values())), len(rows)), file=sys.stderr)
+            else:
+                print('engines: sqlite %s, %d rows' % (name, len(rows)), file=sys.stderr)
+    return failures
+
+#the killed load commits a batch every --batch-size rows, so it leaves committed rows
+#of an unfinished load behind that the next run has to replace
+def check_resume(archive, scratch, batchSize):
+    clean = sink_output(scratch, 'sqlite', 'clean')
+    load(archive, 'sqlite', clean, [])
+    expected = sqlite_rows(clean)
+
+    resumed = sink_output(scratch, 'sqlite', 'resumed')
+    options = ['--batch-size', str(batchSize)]
+    proc = subprocess.Popen(parser_command(archive, 'sqlite', resumed, options), stderr=subprocess.PIPE)
+    stored = 0
+    while proc.poll() is None:
+        stored = stored_rows(resumed)
+        if stored:
+            proc.kill()
+            break
+        time.sleep(0.01)
+    proc.communicate()
+    if not stored or stored >= len(expected):
+        return ['the load finished before it could be interrupted, try a longer --duration or smaller --batch-size']
+    print('resume: killed after %d of %d rows' % (stored, len(expected)), file=sys.stderr)
+
+    load(archive, 'sqlite', resumed, options)
+    if sqlite_rows(resumed) != expected:
+        return ['the interrupted and rerun load differs from a clean one']
+    print('resume: rerun matches the clean load, %d rows' % len(expected), file=sys.stderr)
+    return []
+####################################################################################
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description='Check CAN_Data_Parser loads of a generated log end to end')
+    argp.add_argument('log', nargs='?', help='zip archive to load (default a generated log)')
+    argp.add_argument('--duration', type=float, default=60.0, help='seconds of traffic of the generated log (default 60)')
+    argp.add_argument('--seed', type=int, default=0, help='random seed of the generated log (default 0)')
+    argp.add_argument('--workers', type=int, default=2, help='workers of the parallel engine variants, 1 to skip them (default 2)')
+    argp.add_argument('--batch-size', type=int, default=1000, help='rows per committed batch of the interrupted load (default 1000)')
+    argp.add_argument('--keep', action='store_true', help='keep the scratch directory with the logs and outputs')
+    args = argp.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='can_check_')
+    archive = args.log
+    if archive is None:
+        archive = os.path.join(scratch, 'synthetic.zip')
+        write_log(archive, generate_lines(datetime(2016, 1, 15, 13), args.duration, id_rates(None, 1.0), args.seed))
+    try:
+        failures = check_engines(archive, scratch, args.workers) + check_resume(archive, scratch, args.batch_size)
+    except RuntimeError as e:
+        failures = [str(e)]
+    finally:
+        if args.keep:
+            print('scratch kept in %s' % scratch, file=sys.stderr)
+        else:
+            shutil.rmtree(scratch)
+    for failure in failures:
+        print('FAILED: ' + failure, file=sys.stderr)
+    print('check %s' % ('failed' if failures else 'passed'), file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -4,463 +4,2669 @@
 ##  CAN Data Parser for 
 ##  
 
+from __future__ import print_function
+
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
 import zipfile
-import mysql.connector
-import re
 import sys
-from datetime import datetime
+import time
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from itertools import islice, repeat
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+try:
+    import mysql.connector
+except ImportError:
+    mysql = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-#Data processing functions by ID that return a dictionary with the data ID and value
+try:
+    import can
+except ImportError:
+    can = None
+
+try:
+    intern
+except NameError:
+    from sys import intern
+
+#Signal catalog: every message group is described once as
+#(group, first ID, last ID, signals) with each signal given as
+#(name, start bit, width, scale, offset) and decoded as ((data>>start)&mask)*scale+offset
+#a '%d' in a name is numbered across the ID range, so ID first+1 continues after ID first
 ####################################################################################
-def ControlBatteryCmds(data, id):                                                 ##
-    return {                                                                      ##
-        'FanSwitch': (data>>63)&0x1,                                              ##
-        'BattTracCnnct_D_Rq': (data>>43)&0x3,                                     ##
-        'CellBalSwitch_Expd': (data>>41)&0x3                                      ##
-    }                                                                             ##
-                                                                                  ##
-def HVCyclerStatus(data, id):                                                     ##
-    return {                                                                      ##
-        'HV_Cycler_on_status': (data>>63)&0x1,                                    ##
-        'HV_Cycler_on_cmd': (data>>62)&0x1,                                       ##
-        'HV_Cycler_Power_cmd': ((data>>48)&0x7FF)*100-102400,                     ##
-        'HV_Cycler_Current_Actl': ((data>>32)&0x7FFF)*0.05-750,                   ##
-        'HV_Cycler_Voltage_Actl': ((data>>8)&0xFFF)*0.1                           ##
-    }                                                                             ##
-                                                                                  ##
-def Battery_Traction_1(data, id):                                                 ##
-    return {                                                                      ##
-        'BattTracCnnct_B_Cmd': (data>>63)&0x1,                                    ##
-        'BattTrac_I_Actl': ((data>>48)&0x7FFF)*0.05-750,                          ##
-        'BattTracOff_B_Actl': (data>>44)&0x1,                                     ##
-        'BattTracMil_D_Rq': (data>>42)&0x3,                                       ##
-        'BattTrac_U_Actl': ((data>>32)&0x3FF)*0.5,                                ##
-        'BattTrac_U_LimHi': ((data>>24)&0xFF)*2,                                  ##
-        'BattTrac_U_LimLo': ((data>>16)&0xFF)*2                                   ##
-    }                                                                             ##
-                                                                                  ##
-def LVMVCyclerStatus(data, id):                                                   ##
-    return {                                                                      ##
-        'LV_Cycler_cmd': (data>>62)&0x3,                                          ##
-        'LV_Cycler_Current': ((data>>48)&0x7FF)*0.05-20,                          ##
-        'LV_Cycler_Voltage': ((data>>40)&0xFF)*0.1,                               ##
-        'MV_Cycler_cmd': (data>>30)&0x3,                                          ##
-        'MV_Cycler_status': (data>>28)&0x3,                                       ##
-        'MV_Cycler_Current': ((data>>16)&0x7FF)*0.05-20,                          ##
-        'MV_Cycler_Voltage': (data>>8)&0xFF                                       ##
-    }                                                                             ##
-                                                                                  ##
-def ControlConverterCmds(data, id):                                               ##
-    return {                                                                      ##
-        'ConverterEnable': (data>>63)&0x1,                                        ##
-        'ConverterCalibrate': (data>>61)&0x3,                                     ##
-        'CalibrationVoltage': ((data>>40)&0x1FFF)*0.0001+10,                      ##
-        'Objective_Map_Rq': (data>>37)&0x7,                                       ##
-        'Objective_Map_LifeGain': ((data>>24)&0xFF)*0.0001                        ##
-    }                                                                             ##
-                                                                                  ##
-def ManualConverterCmds(data, id):                                                ##
-    return {                                                                      ##
-        'ConverterEnableSampling': (data>>62)&0x3,                                ##
-        'ConverterEnableSwitching': (data>>60)&0x3,                               ##
-        'ConverterOpenClosedLoop': (data>>58)&0x3,                                ##
-        'Phase_rq': (data>>32)&0xFFFFFF,                                          ##
-        'DestinationAddress': (data>>24)&0xFF,                                    ##
-        'DestinationAddressCap': (data>>16)&0xFF,                                 ##
-        'CellCapacity': (data&0x7FF)*0.01+7                                       ##
-    }                                                                             ##
-                                                                                  ##
-def SetConverterCellLimits(data, id):                                             ##
-    return {                                                                      ##
-        'HighCellVoltageLimit': ((data>>48)&0xFFFF)*0.0001,                       ##
-        'LowCellVoltageLimit': ((data>>32)&0xFFFF)*0.0001,                        ##
-        'HighCellCurrentLimit': ((data>>16)&0xFFFF)*0.001-32.765,                 ##
-        'LowCellCurrentLimit': ((data)&0xFFFF)*0.001-32.765                       ##
-    }                                                                             ##
-                                                                                  ##
-def SetConverterBusLimits(data, id):                                              ##
-    return {                                                                      ##
-        'HighBusVoltageLimit': ((data>>48)&0xFFFF)*0.001,                         ##
-        'LowBusVoltageLimit': ((data>>32)&0xFFFF)*0.001                           ##
-    }                                                                             ##
-                                                                                  ##
-def TargetStatus(data, id):                                                       ##
-    return {                                                                      ##
-        'System_Mode': (data>>62)&0x3,                                            ##
-        'Operating_Mode': (data>>59)&0x7,                                         ##
-        'Objective_Map_Actl': (data>>56)&0x7,                                     ##
-        'Status_Normal': (data>>55)&0x1,                                          ##
-        'Status_System_Fault': (data>>54)&0x1,                                    ##
-        'Status_Saturation': (data>>53)&0x1,                                      ##
-        'Status_Comm_Fault': (data>>52)&0x1,                                      ##
-        'Status_Converter_Fault': (data>>51)&0x1,                                 ##
-        'Comm_Uptime_Percent': ((data>>40)&0x3FF)*0.1                             ##
-    }                                                                             ##
-                                                                                  ##
-def Battery_Traction_2(data, id):                                                 ##
-    return {                                                                      ##
-        'BattTrac_Min_CellVolt': ((data>>48)&0xFFFF)*0.0001,                      ##
-        'BattTrac_Max_CellVolt': ((data>>32)&0xFFFF)*0.0001,                      ##
-        'BattTrac_Pw_LimChrg': ((data>>16)&0x3FF)*250,                            ##
-        'BattTrac_Pw_LimDchrg': ((data)&0x3FF)*250                                ##
-    }                                                                             ##
-                                                                                  ##
-def Battery_Traction_3(data, id):                                                 ##
-    return {                                                                      ##
-        'BattTracWarnLamp_B_Rq': (data>>59)&0x1,                                  ##
-        'BattTracSrvcRqd_B_Rq': (data>>58)&0x1,                                   ##
-        'BattTrac_Min_CellTemp': ((data>>48)&0x3FF)*0.5-50,                       ##
-        'BattTrac_Max_CellTemp': ((data>>32)&0x3FF)*0.5-50,                       ##
-        'BattTracSoc_Pc_MnPrtct': ((data>>16)&0x3FF)*0.1,                         ##
-        'BattTracSoc_Pc_MxPrtct': ((data)&0x3FF)*0.1                              ##
-    }                                                                             ##
-                                                                                  ##
-def Battery_Traction_4(data, id):                                                 ##
-    return {                                                                      ##
-        'BattTracClntIn_Te_Actl': ((data>>56)&0xFF)-50,                           ##
-        'BattTracCool_D_Falt': (data>>50)&0x3,                                    ##
-        'BattTrac_Te_Actl': ((data>>40)&0x3FF)*0.5-50,                            ##
-        'BattTracSoc2_Pc_Actl': ((data>>24)&0x3FFF)*0.01,                         ##
-        'HvacAir_Flw_EstBatt': ((data>>16)&0xFF)*0.5,                             ##
-        'BattTracSoc_Pc_Dsply': ((data>>8)&0xFF)*0.5                              ##
-    }                                                                             ##
-                                                                                  ##
-def Battery_Traction_5(data, id):                                                 ##
-    return {                                                                      ##
-        'BattTracSoc_Min_UHP': ((data>>48)&0x3FF)*0.1,                            ##
-        'BattTracSoc_Max_UHP': ((data>>32)&0x3FF)*0.1,                            ##
-        'BattTracSoc_Min_LHP': ((data>>16)&0x3FF)*0.1,                            ##
-        'BattTracSoc_Max_LHP': ((data)&0x3FF)*0.1                                 ##
-    }                                                                             ##
-                                                                                  ##
-def Unknown(data, id):                                                            ##
-    return {                                                                      ##
-        id: data                                                                  ##
-    }                                                                             ##
-                                                                                  ##
-def CellVoltageGroup(data, id):                                                   ##
-    r = (int(id, 16) % int('300', 16))*4                                          ##
-    return {                                                                      ##
-        'CellVoltage_'+str(r+1): ((data>>48)&0xFFFF)*0.0001,                      ##
-        'CellVoltage_'+str(r+2): ((data>>32)&0xFFFF)*0.0001,                      ##
-        'CellVoltage_'+str(r+3): ((data>>16)&0xFFFF)*0.0001,                      ##
-        'CellVoltage_'+str(r+4): ((data)&0xFFFF)*0.0001                           ##
-    }                                                                             ##
-                                                                                  ##
-def CellCurrentGroup(data, id):                                                   ##
-    r = (int(id, 16) % int('350', 16))*4                                          ##
-    return {                                                                      ##
-        'CellCurrent_'+str(r+1): ((data>>48)&0xFFFF)*0.001-32.765,                ##
-        'CellCurrent_'+str(r+2): ((data>>32)&0xFFFF)*0.001-32.765,                ##
-        'CellCurrent_'+str(r+3): ((data>>16)&0xFFFF)*0.001-32.765,                ##
-        'CellCurrent_'+str(r+4): ((data)&0xFFFF)*0.001-32.765                     ##
-    }                                                                             ##
-                                                                                  ##
-def CellCurrentGroup_11(data, id):                                                ##
-    return {                                                                      ##
-        'CellCurrent_41': ((data>>48)&0xFFFF)*0.001-32.765,                       ##
-        'CellCurrent_42': ((data>>32)&0xFFFF)*0.001-32.765                        ##
-    }                                                                             ##
-                                                                                  ##
-def BECMCellTempGroup(data, id):                                                  ##
-    r = (int(id, 16) % int('360', 16))*4                                          ##
-    return {                                                                      ##
-        'BECM_CellTemp_'+str(r+1): ((data>>48)&0x7FF)*0.1-40,                     ##
-        'BECM_CellTemp_'+str(r+2): ((data>>32)&0x7FF)*0.1-40,                     ##
-        'BECM_CellTemp_'+str(r+3): ((data>>16)&0x7FF)*0.1-40,                     ##
-        'BECM_CellTemp_'+str(r+4): ((data)&0x7FF)*0.1-40                          ##
-    }                                                                             ##
-                                                                                  ##
-def CellTempGroup(data, id):                                                      ##
-    if int(id,16) < int('40E',16):                                                ##
-        r = (int(id, 16) % int('400', 16))*4                                      ##
-        return {                                                                  ##
-            'CellTemp_'+str(r+1): ((data>>48)&0x7FF)*0.1-40,                      ##
-            'CellTemp_'+str(r+2): ((data>>32)&0x7FF)*0.1-40,                      ##
-            'CellTemp_'+str(r+3): ((data>>16)&0x7FF)*0.1-40,                      ##
-            'CellTemp_'+str(r+4): ((data)&0x7FF)*0.1-40                           ##
-        }                                                                         ##
-    else:                                                                         ##
-        r = ((int(id, 16) % int('400', 16))-14)*4                                 ##
-        return {                                                                  ##
-            'BoardTemp_'+str(r+1): ((data>>48)&0x7FF)*0.1-40,                     ##
-            'BoardTemp_'+str(r+2): ((data>>32)&0x7FF)*0.1-40,                     ##
-            'BoardTemp_'+str(r+3): ((data>>16)&0x7FF)*0.1-40,                     ##
-            'BoardTemp_'+str(r+4): ((data)&0x7FF)*0.1-40                          ##
-        }                                                                         ##                                                               
-                                                                                  ##                                                                        #
-def USUCellVoltageGroup(data, id):                                                ##
-    r = (int(id, 16) % int('420', 16))*4                                          ##
-    return {                                                                      ##
-        'USUCellVoltage_'+str(r+1): ((data>>48)&0xFFFF)*0.0001,                   ##
-        'USUCellVoltage_'+str(r+2): ((data>>32)&0xFFFF)*0.0001,                   ##
-        'USUCellVoltage_'+str(r+3): ((data>>16)&0xFFFF)*0.0001,                   ##
-        'USUCellVoltage_'+str(r+4): ((data)&0xFFFF)*0.0001                        ##
-    }                                                                             ##
-                                                                                  ##
-def USUCellVoltageGroup_11(data, id):                                             ##
-    return {                                                                      ##
-        'USUCellVoltage_41': ((data>>48)&0xFFFF)*0.0001,                          ##
-        'USUCellVoltage_42': ((data>>32)&0xFFFF)*0.0001                           ##
-    }                                                                             ##
-                                                                                  ##
-def USUCellSOCGroup(data, id):                                                    ##
-    r = (int(id,16) % int('440',16))*4                                            ##
-    return {                                                                      ##
-        'USUCellSOC_'+str(r+1): ((data>>48)&0x3FFF)*0.01,                         ##
-        'USUCellSOC_'+str(r+2): ((data>>32)&0x3FFF)*0.01,                         ##
-        'USUCellSOC_'+str(r+3): ((data>>16)&0x3FFF)*0.01,                         ##
-        'USUCellSOC_'+str(r+4): ((data)&0x3FFF)*0.01                              ##
-    }                                                                             ##
-                                                                                  ##
-def USUCellSOCGroup_11(data, id):                                                 ##
-    return {                                                                      ##
-        'USUCellSOC_41': ((data>>48)&0x3FFF)*0.01,                                ##
-        'USUCellSOC_42': ((data>>32)&0x3FFF)*0.01,                                ##
-        'USUSOCBounds_41': ((data>>24)&0xFF)*0.1,                                 ##
-        'USUSOCBounds_42': ((data>>16)&0xFF)*0.1,                                 ##
-        'USUBoardTemp_41': ((data>>8)&0xFF)-40,                                   ##
-        'USUBoardTemp_42': ((data)&0xFF)-40                                       ##
-    }                                                                             ##
-                                                                                  ##
-def USUSOCBoundsGroup(data, id):                                                  ##
-    r = ((int(id,16) % int('460'))-1)*8                                           ##
-    return {                                                                      ##
-        'USUSOCBounds_1': ((data>>56)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_2': ((data>>48)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_3': ((data>>40)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_4': ((data>>32)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_5': ((data>>24)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_6': ((data>>16)&0xFF)*0.1,                                  ##
-        'USUSOCBounds_7': ((data>>8)&0xFF)*0.1,                                   ##
-        'USUSOCBounds_8': ((data)&0xFF)*0.1                                       ##
-    }                                                                             ##
-                                                                                  ##
-def USUBoardTempGroup(data, id):                                                  ##
-    r = ((int(id,16) % int('480',16))-1)*8                                        ##
-    return {                                                                      ##
-        'USUBoardTemp_1': ((data>>56)&0xFF)-40,                                   ##
-        'USUBoardTemp_2': ((data>>48)&0xFF)-40,                                   ##
-        'USUBoardTemp_3': ((data>>40)&0xFF)-40,                                   ##
-        'USUBoardTemp_4': ((data>>32)&0xFF)-40,                                   ##
-        'USUBoardTemp_5': ((data>>24)&0xFF)-40,                                   ##
-        'USUBoardTemp_6': ((data>>16)&0xFF)-40,                                   ##
-        'USUBoardTemp_7': ((data>>8)&0xFF)-40,                                    ##
-        'USUBoardTemp_8': ((data)&0xFF)-40                                        ##
-    }                                                                             ##
-                                                                                  ##
-def USUBusVoltageGroup(data, id):                                                 ##
-    r = ((int(id,16) % int('4A0',16))-1)*4                                        ##
-    return {                                                                      ##
-        'USULVBusVoltage_1': ((data>>48)&0xFFF)*0.01,                             ##
-        'USULVBusVoltage_2': ((data>>32)&0xFFF)*0.01,                             ##
-        'USULVBusVoltage_3': ((data>>16)&0xFFF)*0.01,                             ##
-        'USULVBusVoltage_4': ((data)&0xFFF)*0.01                                  ##
-    }                                                                             ##
-                                                                                  ##
-def USUBusVoltageGroup_11(data, id):                                              ##
-    return {                                                                      ##
-        'USULVBusVoltage_41': ((data>>48)&0xFFF)*0.01,                            ##
-        'USULVBusVoltage_42': ((data>>32)&0xFFF)*0.01,                            ##
-    }                                                                             ##
-                                                                                  ##
-def TesterFunctionalReq_H1(data, id):                                             ##
-    return {                                                                      ##
-        'TesterFunctionalReq': data                                               ##
-    }                                                                             ##
-                                                                                  ##
-def TesterPhysicalReqBECM(data, id):                                              ##
-    return {                                                                      ##
-        'TesterPhysicalReqBECM': data                                             ##
-    }                                                                             ##
-                                                                                  ##
-def TesterPhysicalResBECM(data, id):                                              ##
-    return {                                                                      ##
-        'TesterPhysicalResBECM': data                                             ##
-    }                                                                             ##
+#evenly spaced fields of a 64-bit payload, most significant first
+def fields(name, count, width, scale=1, offset=0):
+    step = 64 // count
+    return tuple((name, 64-step*(i+1), width, scale, offset) for i in range(count))
+
+SIGNAL_CATALOG = (
+    ('ControlBatteryCmds', 0x101, 0x101, (
+        ('FanSwitch', 63, 1, 1, 0),
+        ('BattTracCnnct_D_Rq', 43, 2, 1, 0),
+        ('CellBalSwitch_Expd', 41, 2, 1, 0))),
+    ('HVCyclerStatus', 0x103, 0x103, (
+        ('HV_Cycler_on_status', 63, 1, 1, 0),
+        ('HV_Cycler_on_cmd', 62, 1, 1, 0),
+        ('HV_Cycler_Power_cmd', 48, 11, 100, -102400),
+        ('HV_Cycler_Current_Actl', 32, 15, 0.05, -750),
+        ('HV_Cycler_Voltage_Actl', 8, 12, 0.1, 0))),
+    ('Battery_Traction_1', 0x105, 0x105, (
+        ('BattTracCnnct_B_Cmd', 63, 1, 1, 0),
+        ('BattTrac_I_Actl', 48, 15, 0.05, -750),
+        ('BattTracOff_B_Actl', 44, 1, 1, 0),
+        ('BattTracMil_D_Rq', 42, 2, 1, 0),
+        ('BattTrac_U_Actl', 32, 10, 0.5, 0),
+        ('BattTrac_U_LimHi', 24, 8, 2, 0),
+        ('BattTrac_U_LimLo', 16, 8, 2, 0))),
+    ('LVMVCyclerStatus', 0x109, 0x109, (
+        ('LV_Cycler_cmd', 62, 2, 1, 0),
+        ('LV_Cycler_Current', 48, 11, 0.05, -20),
+        ('LV_Cycler_Voltage', 40, 8, 0.1, 0),
+        ('MV_Cycler_cmd', 30, 2, 1, 0),
+        ('MV_Cycler_status', 28, 2, 1, 0),
+        ('MV_Cycler_Current', 16, 11, 0.05, -20),
+        ('MV_Cycler_Voltage', 8, 8, 1, 0))),
+    ('ControlConverterCmds', 0x121, 0x121, (
+        ('ConverterEnable', 63, 1, 1, 0),
+        ('ConverterCalibrate', 61, 2, 1, 0),
+        ('CalibrationVoltage', 40, 13, 0.0001, 10),
+        ('Objective_Map_Rq', 37, 3, 1, 0),
+        ('Objective_Map_LifeGain', 24, 8, 0.0001, 0))),
+    ('ManualConverterCmds', 0x122, 0x122, (
+        ('ConverterEnableSampling', 62, 2, 1, 0),
+        ('ConverterEnableSwitching', 60, 2, 1, 0),
+        ('ConverterOpenClosedLoop', 58, 2, 1, 0),
+        ('Phase_rq', 32, 24, 1, 0),
+        ('DestinationAddress', 24, 8, 1, 0),
+        ('DestinationAddressCap', 16, 8, 1, 0),
+        ('CellCapacity', 0, 11, 0.01, 7))),
+    ('SetConverterCellLimits', 0x124, 0x124, (
+        ('HighCellVoltageLimit', 48, 16, 0.0001, 0),
+        ('LowCellVoltageLimit', 32, 16, 0.0001, 0),
+        ('HighCellCurrentLimit', 16, 16, 0.001, -32.765),
+        ('LowCellCurrentLimit', 0, 16, 0.001, -32.765))),
+    ('SetConverterBusLimits', 0x126, 0x126, (
+        ('HighBusVoltageLimit', 48, 16, 0.001, 0),
+        ('LowBusVoltageLimit', 32, 16, 0.001, 0))),
+    ('TargetStatus', 0x140, 0x140, (
+        ('System_Mode', 62, 2, 1, 0),
+        ('Operating_Mode', 59, 3, 1, 0),
+        ('Objective_Map_Actl', 56, 3, 1, 0),
+        ('Status_Normal', 55, 1, 1, 0),
+        ('Status_System_Fault', 54, 1, 1, 0),
+        ('Status_Saturation', 53, 1, 1, 0),
+        ('Status_Comm_Fault', 52, 1, 1, 0),
+        ('Status_Converter_Fault', 51, 1, 1, 0),
+        ('Comm_Uptime_Percent', 40, 10, 0.1, 0))),
+    ('Battery_Traction_2', 0x22A, 0x22A, (
+        ('BattTrac_Min_CellVolt', 48, 16, 0.0001, 0),
+        ('BattTrac_Max_CellVolt', 32, 16, 0.0001, 0),
+        ('BattTrac_Pw_LimChrg', 16, 10, 250, 0),
+        ('BattTrac_Pw_LimDchrg', 0, 10, 250, 0))),
+    ('Battery_Traction_3', 0x22B, 0x22B, (
+        ('BattTracWarnLamp_B_Rq', 59, 1, 1, 0),
+        ('BattTracSrvcRqd_B_Rq', 58, 1, 1, 0),
+        ('BattTrac_Min_CellTemp', 48, 10, 0.5, -50),
+        ('BattTrac_Max_CellTemp', 32, 10, 0.5, -50),
+        ('BattTracSoc_Pc_MnPrtct', 16, 10, 0.1, 0),
+        ('BattTracSoc_Pc_MxPrtct', 0, 10, 0.1, 0))),
+    ('Battery_Traction_4', 0x22C, 0x22C, (
+        ('BattTracClntIn_Te_Actl', 56, 8, 1, -50),
+        ('BattTracCool_D_Falt', 50, 2, 1, 0),
+        ('BattTrac_Te_Actl', 40, 10, 0.5, -50),
+        ('BattTracSoc2_Pc_Actl', 24, 14, 0.01, 0),
+        ('HvacAir_Flw_EstBatt', 16, 8, 0.5, 0),
+        ('BattTracSoc_Pc_Dsply', 8, 8, 0.5, 0))),
+    ('Battery_Traction_5', 0x22D, 0x22D, (
+        ('BattTracSoc_Min_UHP', 48, 10, 0.1, 0),
+        ('BattTracSoc_Max_UHP', 32, 10, 0.1, 0),
+        ('BattTracSoc_Min_LHP', 16, 10, 0.1, 0),
+        ('BattTracSoc_Max_LHP', 0, 10, 0.1, 0))),
+    ('CellVoltageGroup', 0x300, 0x314, fields('CellVoltage_%d', 4, 16, 0.0001)),
+    ('CellCurrentGroup', 0x350, 0x359, fields('CellCurrent_%d', 4, 16, 0.001, -32.765)),
+    ('CellCurrentGroup_11', 0x35A, 0x35A, (
+        ('CellCurrent_41', 48, 16, 0.001, -32.765),
+        ('CellCurrent_42', 32, 16, 0.001, -32.765))),
+    ('BECMCellTempGroup', 0x360, 0x374, fields('BECM_CellTemp_%d', 4, 11, 0.1, -40)),
+    ('CellTempGroup', 0x400, 0x40D, fields('CellTemp_%d', 4, 11, 0.1, -40)),
+    ('CellTempGroup', 0x40E, 0x414, fields('BoardTemp_%d', 4, 11, 0.1, -40)),
+    ('USUCellVoltageGroup', 0x420, 0x429, fields('USUCellVoltage_%d', 4, 16, 0.0001)),
+    ('USUCellVoltageGroup_11', 0x42A, 0x42A, (
+        ('USUCellVoltage_41', 48, 16, 0.0001, 0),
+        ('USUCellVoltage_42', 32, 16, 0.0001, 0))),
+    ('USUCellSOCGroup', 0x440, 0x449, fields('USUCellSOC_%d', 4, 14, 0.01)),
+    ('USUCellSOCGroup_11', 0x44A, 0x44A, (
+        ('USUCellSOC_41', 48, 14, 0.01, 0),
+        ('USUCellSOC_42', 32, 14, 0.01, 0),
+        ('USUSOCBounds_41', 24, 8, 0.1, 0),
+        ('USUSOCBounds_42', 16, 8, 0.1, 0),
+        ('USUBoardTemp_41', 8, 8, 1, -40),
+        ('USUBoardTemp_42', 0, 8, 1, -40))),
+    ('USUSOCBoundsGroup', 0x461, 0x465, fields('USUSOCBounds_%d', 8, 8, 0.1)),
+    ('USUBoardTempGroup', 0x481, 0x485, fields('USUBoardTemp_%d', 8, 8, 1, -40)),
+    ('USUBusVoltageGroup', 0x4A1, 0x4AA, fields('USULVBusVoltage_%d', 4, 12, 0.01)),
+    ('USUBusVoltageGroup_11', 0x4AB, 0x4AB, (
+        ('USULVBusVoltage_41', 48, 12, 0.01, 0),
+        ('USULVBusVoltage_42', 32, 12, 0.01, 0))),
+    ('TesterFunctionalReq_H1', 0x7DF, 0x7DF, (('TesterFunctionalReq', 0, 64, 1, 0),)),
+    ('TesterPhysicalReqBECM', 0x7E4, 0x7E4, (('TesterPhysicalReqBECM', 0, 64, 1, 0),)),
+    ('TesterPhysicalResBECM', 0x7EC, 0x7EC, (('TesterPhysicalResBECM', 0, 64, 1, 0),))
+)
 ####################################################################################
 
-#generates and executes SQL script to write data to database
-def send2SQL(timestamp, dataGroup, dataHash):
-    #if (dataGroup == "Unknown"):
-    #    return
-    feed = []
-    for key, val in dataHash.iteritems():
-        feed.append((dataGroup, key, timestamp, val))
-    for toop in feed:
-        curs.execute("INSERT INTO can_data VALUES (%s,%s,%s,%s)", toop)
-    return
-
-#main parser script with dictionary branching to data processing function according to ID
-def parse_data(line):
-    pat = r'(\d+)/(\d+)/(\d+) (\d+):(\d+):(\d+)\.(\d+): (\w+) (.*) '
-    match = re.match(pat, line)
-    myDateTime = datetime(int(match.group(3)),int(match.group(1)),int(match.group(2)),int(match.group(4)),int(match.group(5)),int(match.group(6)),int(match.group(7))*1000)
-    
-    #transform 8-byte data list to one 64-bit long
-    data = int(''.join(match.group(9).split(' ')),16)
-
-    #function names associated with each ID
-    ID = {
-        '101': ControlBatteryCmds,
-        '103': HVCyclerStatus,
-        '105': Battery_Traction_1,
-        '109': LVMVCyclerStatus,
-        '121': ControlConverterCmds,
-        '122': ManualConverterCmds,
-        '124': SetConverterCellLimits,
-        '126': SetConverterBusLimits,
-        '140': TargetStatus,
-        '22A': Battery_Traction_2,
-        '22B': Battery_Traction_3,
-        '22C': Battery_Traction_4,
-        '22D': Battery_Traction_5,
-        '300': CellVoltageGroup,
-        '301': CellVoltageGroup,
-        '302': CellVoltageGroup,
-        '303': CellVoltageGroup,
-        '304': CellVoltageGroup,
-        '305': CellVoltageGroup,
-        '306': CellVoltageGroup,
-        '307': CellVoltageGroup,
-        '308': CellVoltageGroup,
-        '309': CellVoltageGroup,
-        '30A': CellVoltageGroup,
-        '30B': CellVoltageGroup,
-        '30C': CellVoltageGroup,
-        '30D': CellVoltageGroup,
-        '30E': CellVoltageGroup,
-        '30F': CellVoltageGroup,
-        '310': CellVoltageGroup,
-        '311': CellVoltageGroup,
-        '312': CellVoltageGroup,
-        '313': CellVoltageGroup,
-        '314': CellVoltageGroup,
-        '350': CellCurrentGroup,
-        '351': CellCurrentGroup,
-        '352': CellCurrentGroup,
-        '353': CellCurrentGroup,
-        '354': CellCurrentGroup,
-        '355': CellCurrentGroup,
-        '356': CellCurrentGroup,
-        '357': CellCurrentGroup,
-        '358': CellCurrentGroup,
-        '359': CellCurrentGroup,
-        '35A': CellCurrentGroup_11,
-        '360': BECMCellTempGroup,
-        '361': BECMCellTempGroup,
-        '362': BECMCellTempGroup,
-        '363': BECMCellTempGroup,
-        '364': BECMCellTempGroup,
-        '365': BECMCellTempGroup,
-        '366': BECMCellTempGroup,
-        '367': BECMCellTempGroup,
-        '368': BECMCellTempGroup,
-        '369': BECMCellTempGroup,
-        '36A': BECMCellTempGroup,
-        '36B': BECMCellTempGroup,
-        '36C': BECMCellTempGroup,
-        '36D': BECMCellTempGroup,
-        '36E': BECMCellTempGroup,
-        '36F': BECMCellTempGroup,
-        '370': BECMCellTempGroup,
-        '371': BECMCellTempGroup,
-        '372': BECMCellTempGroup,
-        '373': BECMCellTempGroup,
-        '374': BECMCellTempGroup,
-        '400': CellTempGroup,
-        '401': CellTempGroup,
-        '402': CellTempGroup,
-        '403': CellTempGroup,
-        '404': CellTempGroup,
-        '405': CellTempGroup,
-        '406': CellTempGroup,
-        '407': CellTempGroup,
-        '408': CellTempGroup,
-        '409': CellTempGroup,
-        '40A': CellTempGroup,
-        '40B': CellTempGroup,
-        '40C': CellTempGroup,
-        '40D': CellTempGroup,
-        '40E': CellTempGroup,
-        '40F': CellTempGroup,
-        '410': CellTempGroup,
-        '411': CellTempGroup,
-        '412': CellTempGroup,
-        '413': CellTempGroup,
-        '414': CellTempGroup,
-        '420': USUCellVoltageGroup,
-        '421': USUCellVoltageGroup,
-        '422': USUCellVoltageGroup,
-        '423': USUCellVoltageGroup,
-        '424': USUCellVoltageGroup,
-        '425': USUCellVoltageGroup,
-        '426': USUCellVoltageGroup,
-        '427': USUCellVoltageGroup,
-        '428': USUCellVoltageGroup,
-        '429': USUCellVoltageGroup,
-        '42A': USUCellVoltageGroup_11,
-        '440': USUCellSOCGroup,
-        '441': USUCellSOCGroup,
-        '442': USUCellSOCGroup,
-        '443': USUCellSOCGroup,
-        '444': USUCellSOCGroup,
-        '445': USUCellSOCGroup,
-        '446': USUCellSOCGroup,
-        '447': USUCellSOCGroup,
-        '448': USUCellSOCGroup,
-        '449': USUCellSOCGroup,
-        '44A': USUCellSOCGroup_11,
-        '461': USUSOCBoundsGroup,
-        '462': USUSOCBoundsGroup,
-        '463': USUSOCBoundsGroup,
-        '464': USUSOCBoundsGroup,
-        '465': USUSOCBoundsGroup,
-        '481': USUBoardTempGroup,
-        '482': USUBoardTempGroup,
-        '483': USUBoardTempGroup,
-        '484': USUBoardTempGroup,
-        '485': USUBoardTempGroup,
-        '4A1': USUBusVoltageGroup,
-        '4A2': USUBusVoltageGroup,
-        '4A3': USUBusVoltageGroup,
-        '4A4': USUBusVoltageGroup,
-        '4A5': USUBusVoltageGroup,
-        '4A6': USUBusVoltageGroup,
-        '4A7': USUBusVoltageGroup,
-        '4A8': USUBusVoltageGroup,
-        '4A9': USUBusVoltageGroup,
-        '4AA': USUBusVoltageGroup,
-        '4AB': USUBusVoltageGroup_11,
-        '7DF': TesterFunctionalReq_H1,
-        '7E4': TesterPhysicalReqBECM,
-        '7EC': TesterPhysicalResBECM
-    }
-
-    func = ID.get(match.group(8), Unknown)
-    dataHash = func(data,match.group(8))
-    #funcname = re.search(r'function (\w*) at',str(func)).group(1)
-    #if (re.match(r'\_\d', funcname)):
-    #    dataGroup = funcname
-    #else:
-    #    iddiff = int(match.group(8),16)%16
-    #    dataGroup = funcname + "_" + str(iddiff+1)
-    #send2SQL(myDateTime, dataGroup, dataHash, curs)
-    send2SQL(myDateTime, re.search(r'function (\w*) at',str(func)).group(1), dataHash)
-    return
+#frames with an ID missing from the catalog are stored whole under their hex ID
+UNKNOWN = 'Unknown'
 
-if __name__ == '__main__':
-    zipFileName = sys.argv[1];
-    
-    conn = mysql.connector.connect(user = 'root', password = 'FhVj9ot4', host = '104.154.59.36', port = '3306', database = "amped")
+#expands the catalog into {ID: (group, ((name, shift, mask, scale, offset), ...))}
+#with every group and signal name interned, so decoding never builds a string
+def compile_catalog(catalog):
+    plans = {}
+    for group, firstId, lastId, signals in catalog:
+        group = intern(group)
+        for canId in range(firstId, lastId+1):
+            plan = []
+            for i, (name, start, width, scale, offset) in enumerate(signals):
+                if '%d' in name:
+                    name = name % ((canId-firstId)*len(signals) + i+1)
+                plan.append((intern(name), start, (1<<width)-1, scale, offset))
+            plans[canId] = (group, tuple(plan))
+    return plans
+
+DECODE_PLANS = compile_catalog(SIGNAL_CATALOG)
+
+#applies the precomputed plan of an ID to a 64-bit payload
+#returns the decoder group and a list of (signal name, value) pairs
+def decode(canId, data):
+    plan = DECODE_PLANS.get(canId)
+    if plan is None:
+        return UNKNOWN, [('%03X' % canId, data)]
+    group, signals = plan
+    return group, [(name, ((data>>shift)&mask)*scale+offset) for name, shift, mask, scale, offset in signals]
+
+#bounded LRU cache of decoded frames keyed on ID and payload, for the frames that repeat
+#byte for byte (commands, limits, tester requests, idle status); the cached signals are
+#a tuple, so a hit is handed out again without a copy; IDs outside canIds bypass it
+class DecodeCache(object):
+    def __init__(self, size, canIds):
+        self.size = size
+        self.canIds = frozenset(canIds)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypassed = 0
+
+    def decode(self, canId, data):
+        if canId not in self.canIds:
+            self.bypassed += 1
+            return decode(canId, data)
+        #one int hashes faster than an (ID, payload) tuple
+        key = data << 16 | canId
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            dataGroup, signals = decode(canId, data)
+            entry = (dataGroup, tuple(signals))
+            if len(self.entries) >= self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+        self.entries[key] = entry
+        return entry
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'size': self.size, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'bypassed': self.bypassed,
+                'hit_rate': round(float(self.hits)/lookups, 4) if lookups else 0.0}
+
+    def report(self):
+        return 'decode cache %d hits, %d misses (%.1f%% hit rate), %d evictions, %d frames bypassed' % (
+            self.hits, self.misses, self.summary()['hit_rate']*100, self.evictions, self.bypassed)
+
+#groups whose payloads rarely repeat and bypass the cache unless --cache-group names them
+CACHE_BYPASS_GROUPS = ('CellVoltageGroup', 'CellCurrentGroup', 'CellCurrentGroup_11', 'BECMCellTempGroup', 'CellTempGroup',
+                       'USUCellVoltageGroup', 'USUCellVoltageGroup_11', 'USUCellSOCGroup', 'USUCellSOCGroup_11')
+
+#output sink: collects rows across frames and hands them to write(rows) in batches
+#a batch is flushed once it holds batchSize rows or flushInterval seconds have passed
+#every output is a subclass that implements write for its storage; close writes what
+#is left, abort drops it after a failed load
+class Sink(object):
+    def __init__(self, batchSize=5000, flushInterval=5.0, verbose=False):
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.verbose = verbose
+        self.rows = []
+        self.rowsWritten = 0
+        self.writeTime = 0.0
+        self.started = time.time()
+        self.lastFlush = self.started
+
+    def add(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batchSize or time.time() - self.lastFlush >= self.flushInterval:
+            self.flush()
+
+    def flush(self):
+        self.lastFlush = time.time()
+        if not self.rows:
+            return
+        self.write(self.rows)
+        self.writeTime += time.time() - self.lastFlush
+        self.rowsWritten += len(self.rows)
+        if self.verbose:
+            print('flushed %d rows, %s' % (len(self.rows), self.report()), file=sys.stderr)
+        self.rows = []
+
+    #converts epoch microseconds into the timestamp type the sink stores
+    def stamp(self, timestamp):
+        return us2datetime(timestamp)
+
+    def write(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        print(self.report(), file=sys.stderr)
+
+    #drops buffered rows after a failed load; the caller rolls the connection back
+    def abort(self):
+        self.rows = []
+
+    #overall rows/s since the writer was created and rows/s spent inside the database calls
+    def report(self):
+        elapsed = time.time() - self.started
+        return '%d rows in %.1fs (%.0f rows/s overall, %.0f rows/s in SQL)' % (
+            self.rowsWritten, elapsed,
+            self.rowsWritten / elapsed if elapsed else 0.0,
+            self.rowsWritten / self.writeTime if self.writeTime else 0.0)
+
+#Sink that writes batches to table with multi-row inserts on curs; the other SQL sinks
+#override execute(curs, rows) with their statements
+#every row is tagged with the loadId of its load in the last column, load_id, written as a
+#literal of the statement instead of a field of every row
+class SQLWriter(Sink):
+    def __init__(self, curs, batchSize=5000, flushInterval=5.0, verbose=False, table='can_data', loadId=None):
+        Sink.__init__(self, batchSize, flushInterval, verbose)
+        self.curs = curs
+        self.table = table
+        self.loadId = loadId
+        self.loadValue = 'NULL' if loadId is None else '%d' % loadId
+
+    def write(self, rows):
+        self.execute(self.curs, rows)
+
+    def execute(self, curs, rows):
+        #mysql.connector rewrites executemany on INSERT ... VALUES into one multi-row statement
+        curs.executemany('INSERT INTO %s VALUES (%s,%s)' % (self.table, ','.join(['%s']*len(rows[0])), self.loadValue), rows)
+
+#SQLWriter whose batches are written by background threads, each on its own connection,
+#so decoding continues while MySQL works; a full queue of queueBatches blocks the decoder
+#the connections are only committed once every thread has drained the queue and none of
+#them failed, otherwise all of them are rolled back
+class ThreadedSQLWriter(SQLWriter):
+    def __init__(self, connect, threads=1, queueBatches=8, batchSize=5000, flushInterval=5.0, verbose=False,
+                 table='can_data', loadId=None):
+        SQLWriter.__init__(self, None, batchSize, flushInterval, verbose, table, loadId)
+        self.queue = Queue(queueBatches)
+        self.lock = threading.Lock()
+        self.errors = []
+        self.connections = []
+        self.aborted = False
+        self.stopped = False
+        self.batches = 0
+        self.depthTotal = 0
+        self.maxDepth = 0
+        self.blockedTime = 0.0
+        self.threads = [threading.Thread(target=self.drain, args=(connect,)) for i in range(threads)]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def flush(self):
+        self.lastFlush = time.time()
+        if not self.rows:
+            return
+        depth = self.queue.qsize()
+        self.batches += 1
+        self.depthTotal += depth
+        self.maxDepth = max(self.maxDepth, depth)
+        self.queue.put(self.rows)
+        self.blockedTime += time.time() - self.lastFlush
+        if self.verbose:
+            print('queued %d rows, %s' % (len(self.rows), self.report()), file=sys.stderr)
+        self.rows = []
+
+    #writes batches until this thread takes its None; the connection is left open for stop
+    def drain(self, connect):
+        stopped = False
+        try:
+            conn = connect()
+            self.connections.append(conn)
+            curs = conn.cursor()
+            while True:
+                batch = self.queue.get()
+                if batch is None:
+                    stopped = True
+                    break
+                if self.errors or self.aborted:
+                    continue
+                started = time.time()
+                self.execute(curs, batch)
+                with self.lock:
+                    self.writeTime += time.time() - started
+                    self.rowsWritten += len(batch)
+            curs.close()
+        except Exception as e:
+            self.errors.append(e)
+            #keep taking batches so a blocked decoder is released, up to this thread's own None
+            while not stopped and self.queue.get() is not None:
+                pass
+
+    #a commit that fails after others succeeded still leaves those committed, the
+    #connections are separate transactions
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        for conn in self.connections:
+            try:
+                if self.errors or self.aborted:
+                    conn.rollback()
+                else:
+                    conn.commit()
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                conn.close()
+
+    def close(self):
+        self.flush()
+        self.stop()
+        if self.errors:
+            raise self.errors[0]
+        print(self.report(), file=sys.stderr)
+
+    def abort(self):
+        self.rows = []
+        self.aborted = True
+        self.stop()
+
+    #adds the queue depth seen at each flush and the time the decoder spent blocked on a full queue
+    def report(self):
+        return '%s, queue depth %.1f avg %d max, %.1fs blocked' % (
+            Sink.report(self), self.depthTotal / float(self.batches) if self.batches else 0.0,
+            self.maxDepth, self.blockedTime)
+
+#SQLWriter that writes each batch to a temporary TSV file and bulk-loads it with
+#LOAD DATA LOCAL INFILE; a chunk is loaded inside the member's transaction, so a failed
+#load (a deadlock rolls the whole transaction back) fails the member, and a rerun with
+#--commit-frames resumes after the last checkpoint; the connection needs allow_local_infile
+class LoadDataWriter(SQLWriter):
+    LOAD = "LOAD DATA LOCAL INFILE %%s INTO TABLE %s FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'"
+
+    def execute(self, curs, rows):
+        #no newline translation, the lines have to end in the '\n' the statement expects
+        if sys.version_info[0] < 3:
+            tsv = tempfile.NamedTemporaryFile('wb', suffix='.tsv', delete=False)
+        else:
+            tsv = tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, newline='')
+        end = '\t%s\n' % ('\\N' if self.loadId is None else self.loadValue)
+        with tsv:
+            tsv.writelines('\t'.join([sqlfield(field) for field in row]) + end for row in rows)
+        try:
+            curs.execute(self.LOAD % self.table, (tsv.name,))
+        finally:
+            os.remove(tsv.name)
+
+class ThreadedLoadDataWriter(ThreadedSQLWriter, LoadDataWriter):
+    pass
+
+#text form of a row field that MySQL parses back to the value the INSERT path binds
+def sqlfield(val):
+    if isinstance(val, float):
+        return repr(val)
+    if isinstance(val, datetime):
+        return val.isoformat(' ')
+    if isinstance(val, str):
+        return val
+    return str(int(val))
+
+#SQLite sink: one can_data table in a WAL-mode database file, one transaction per batch
+#so concurrent jobs only hold the write lock while a batch is written; a failed load
+#deletes the rows its committed batches and rollups left under its load_id again, and
+#should that fail as well its unfinished manifest row has the next load replace them
+class SQLiteWriter(SQLWriter):
+    def __init__(self, path, batchSize=5000, flushInterval=5.0, verbose=False, table='can_data', loadId=None):
+        self.conn = sqlite3.connect(path, timeout=600)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS %s (data_group TEXT, name TEXT, ts TEXT, value REAL, load_id INTEGER)' % table)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS %s_load ON %s (load_id)' % (table, table))
+        SQLWriter.__init__(self, self.conn.cursor(), batchSize, flushInterval, verbose, table, loadId)
+
+    def execute(self, curs, rows):
+        #SQLite integers are signed 64-bit, so whole 64-bit payloads are stored as REAL
+        with self.conn:
+            curs.executemany('INSERT INTO %s VALUES (?,?,?,?,%s)' % (self.table, self.loadValue),
+                             (row if row[3] < 1<<63 else row[:3] + (float(row[3]),) for row in rows))
+
+    def close(self):
+        Sink.close(self)
+        self.conn.close()
+
+    def abort(self):
+        Sink.abort(self)
+        try:
+            if self.loadId is not None:
+                with self.conn:
+                    for table in load_id_tables(self.conn, self.curs):
+                        self.curs.execute('DELETE FROM %s WHERE load_id = %s' % (table, self.loadValue))
+        except sqlite3.Error:
+            pass
+        finally:
+            self.conn.close()
+
+sqlite3.register_adapter(datetime, lambda timestamp: timestamp.isoformat(' '))
+
+#CSV sink: one data_group,name,ts,value file per archive member
+class CSVWriter(Sink):
+    HEADER = ('data_group', 'name', 'ts', 'value')
+
+    def __init__(self, path, batchSize=5000, flushInterval=5.0, verbose=False):
+        Sink.__init__(self, batchSize, flushInterval, verbose)
+        if sys.version_info[0] < 3:
+            self.outfile = open(path, 'wb')
+        else:
+            self.outfile = open(path, 'w', newline='')
+        self.out = csv.writer(self.outfile)
+        self.out.writerow(self.HEADER)
+
+    #every batch reaches the file, so a followed log is readable as it is written
+    def write(self, rows):
+        self.out.writerows(rows)
+        self.outfile.flush()
+
+    def close(self):
+        Sink.close(self)
+        self.outfile.close()
+
+    def abort(self):
+        Sink.abort(self)
+        self.outfile.close()
+
+#NumPy sink: every signal of a session becomes an int64 epoch-microsecond column and a
+#value column, saved per decoder group as <session>/<group>.npz with '<signal>.ts' and
+#'<signal>.value' members, so reading one signal only decompresses its two arrays
+class NPZWriter(Sink):
+    chunkRows = 1<<16
+
+    def __init__(self, path, verbose=False):
+        Sink.__init__(self, verbose=verbose)
+        self.path = path
+        self.series = {}
+
+    def stamp(self, timestamp):
+        return timestamp
+
+    def add(self, rows):
+        for dataGroup, key, timestamp, val in rows:
+            series = self.series.get((dataGroup, key))
+            if series is None:
+                series = self.series[dataGroup, key] = ([], [], [], [])
+            series[0].append(timestamp)
+            series[1].append(val)
+            if len(series[0]) >= self.chunkRows:
+                self.pack(key, series)
+        self.rowsWritten += len(rows)
+
+    #appends whole decoded columns from the NumPy engine
+    def add_columns(self, dataGroup, key, stamps, values):
+        series = self.series.get((dataGroup, key))
+        if series is None:
+            series = self.series[dataGroup, key] = ([], [], [], [])
+        self.pack(key, series)
+        series[2].append(stamps)
+        series[3].append(values.astype(npz_dtype(key)))
+        self.rowsWritten += len(stamps)
+
+    #moves the pending Python values of a series into NumPy chunks
+    def pack(self, key, series):
+        if series[0]:
+            series[2].append(np.array(series[0], np.int64))
+            series[3].append(np.array(series[1], npz_dtype(key)))
+            del series[0][:], series[1][:]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        started = time.time()
+        groups = {}
+        for (dataGroup, key), series in self.series.items():
+            self.pack(key, series)
+            groups.setdefault(dataGroup, {})[key + '.ts'] = np.concatenate(series[2])
+            groups[dataGroup][key + '.value'] = np.concatenate(series[3])
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        for dataGroup, arrays in groups.items():
+            np.savez_compressed(os.path.join(self.path, dataGroup + '.npz'), **arrays)
+        self.writeTime = time.time() - started
+        self.series = {}
+        print(self.report(), file=sys.stderr)
+
+    def abort(self):
+        self.series = {}
+
+#NumPy dtype of a signal's value column: float64 for scaled signals, uint64 for whole
+#payloads and unknown IDs, int64 for the other integer signals
+def npz_dtype(key):
+    return NPZ_DTYPES.get(key, np.uint64)
+
+NPZ_DTYPES = {}
+if np is not None:
+    for canId, (group, signals) in DECODE_PLANS.items():
+        for name, shift, mask, scale, offset in signals:
+            if isinstance(scale, float) or isinstance(offset, float):
+                NPZ_DTYPES[name] = np.float64
+            else:
+                NPZ_DTYPES[name] = np.uint64 if mask*scale + offset >= 1<<63 else np.int64
+
+#reads one signal of an exported session back as (epoch microseconds, values)
+def load_signal(session, dataGroup, name):
+    with np.load(os.path.join(session, dataGroup + '.npz')) as npz:
+        return npz[name + '.ts'], npz[name + '.value']
+
+MYSQL_SINKS = ('insert', 'load')
+
+#file name stem for one archive member inside an output directory
+#a followed log has no member and is named after the file alone
+def session_name(archive, member):
+    if not member:
+        return os.path.splitext(os.path.basename(archive))[0]
+    return '%s_%s' % (os.path.splitext(os.path.basename(archive))[0],
+                      os.path.splitext(member)[0].replace('/', '_'))
+
+#builds the writer selected on the command line, tagging the rows of the SQL sinks with loadId
+def make_writer(args, curs, archive=None, member=None, loadId=None):
+    if args.sink == 'sqlite':
+        return SQLiteWriter(args.output, args.batch_size, args.flush_interval, args.verbose, loadId=loadId)
+    if args.sink == 'csv':
+        return CSVWriter(os.path.join(args.output, session_name(archive, member) + '.csv'),
+                         args.batch_size, args.flush_interval, args.verbose)
+    if args.sink == 'npz':
+        return NPZWriter(os.path.join(args.output, session_name(archive, member)), args.verbose)
+    table = 'can_samples' if args.schema == 'encoded' else 'can_data'
+    if args.schema == 'text':
+        table = text_table(curs)
+    if args.writer_threads:
+        cls = ThreadedLoadDataWriter if args.sink == 'load' else ThreadedSQLWriter
+        if args.schema == 'wide':
+            cls = ThreadedWideSQLWriter
+        return cls(lambda: connect(args.sink == 'load'), args.writer_threads, args.queue_batches,
+                   args.batch_size, args.flush_interval, args.verbose, table, loadId)
+    cls = LoadDataWriter if args.sink == 'load' else SQLWriter
+    if args.schema == 'wide':
+        cls = WideSQLWriter
+    return cls(curs, args.batch_size, args.flush_interval, args.verbose, table, loadId)
+
+#one load's path from log lines to its sink: the frame parser, the decoder (through the
+#decode cache when there is one), the selection and the stages in front of the sink
+#(deadband, rollups, signal IDs); the ingest functions take it as an argument, and
+#run_job adds the checkpointer and stats of a member
+#split, decode, send, decode_columns and send_columns are the stages; Stats replaces
+#them with timed wrappers
+class Pipeline(object):
+    def __init__(self, writer, schema='text', selection=None, decodeCache=None, deadband=None, rollups=None,
+                 signalIds=None, frameParser=None):
+        self.writer = writer
+        self.schema = schema
+        self.selection = selection
+        self.decodeCache = decodeCache
+        self.decode = decodeCache.decode if decodeCache is not None else decode
+        self.deadband = deadband
+        self.rollups = rollups
+        self.signalIds = signalIds
+        self.frameParser = frameParser if frameParser is not None else FrameParser()
+        self.split = self.frameParser.parse
+        self.decode_columns = decode_columns
+        self.checkpointer = None
+        self.stats = None
+
+    #returns the frame timestamp in epoch microseconds, decoder group and decoded signals
+    #or None for a malformed line
+    def parse(self, line):
+        frame = self.split(line)
+        if frame is None:
+            return None
+        timestamp, canId, data = frame
+        dataGroup, signals = self.decode(canId, data)
+        return timestamp, dataGroup, signals
+
+    #queues one row per decoded signal on the buffered writer
+    def send(self, timestamp, dataGroup, signals):
+        #if (dataGroup == "Unknown"):
+        #    return
+        if self.rollups is not None and dataGroup != UNKNOWN:
+            self.rollups.add(timestamp, dataGroup, signals)
+        if self.deadband is not None and dataGroup != UNKNOWN:
+            signals = self.deadband.filter(timestamp, signals)
+            if not signals:
+                return
+        writer = self.writer
+        myDateTime = writer.stamp(timestamp)
+        if self.schema == 'wide':
+            writer.add([(signals[0][0], (myDateTime,) + tuple([val for key, val in signals]))])
+        elif self.signalIds is None:
+            writer.add([(dataGroup, key, myDateTime, val) for key, val in signals])
+        else:
+            signalIds = self.signalIds
+            writer.add([(signalIds[dataGroup, key], myDateTime, val) for key, val in signals])
+
+    #queues decoded columns of the NumPy engine on the buffered writer
+    def send_columns(self, columns):
+        writer = self.writer
+        for dataGroup, key, stamps, values in columns:
+            if self.rollups is not None and dataGroup != UNKNOWN:
+                self.rollups.add_columns(dataGroup, key, stamps, values)
+            if isinstance(writer, NPZWriter):
+                writer.add_columns(dataGroup, key, stamps, values)
+                continue
+            stamps = stamps.astype('datetime64[us]').tolist()
+            if self.signalIds is None:
+                writer.add(list(zip(repeat(dataGroup), repeat(key), stamps, values.tolist())))
+            else:
+                writer.add(list(zip(repeat(self.signalIds[dataGroup, key]), stamps, values.tolist())))
+
+EPOCH = datetime(1970, 1, 1)
+
+#log timestamps carry no zone, so epoch microseconds are counted from a naive 1970-01-01
+def us2datetime(timestamp):
+    return EPOCH + timedelta(microseconds=timestamp)
+
+def datetime2us(stamp):
+    delta = stamp - EPOCH
+    return (delta.days*86400 + delta.seconds)*1000000 + delta.microseconds
+
+#splits 'M/D/Y H:M:S.mmm: ID B0 B1 B2 B3 B4 B5 B6 B7 ' lines into
+#(epoch microseconds, integer ID, integer payload) without a regex
+#consecutive lines share the date/second prefix, so it is only converted when it changes
+class FrameParser(object):
+    def __init__(self):
+        self.prefix = None
+        self.secondUs = 0
+        self.lines = 0
+        self.malformed = 0
+        #lines dropped by a Selection before they reached parse
+        self.filtered = 0
+
+    def parse(self, line):
+        self.lines += 1
+        try:
+            dot = line.index('.')
+            prefix = line[:dot]
+            if prefix != self.prefix:
+                self.secondUs = self.prefix2us(prefix)
+                self.prefix = prefix
+            colon = line.index(': ', dot)
+            ms = int(line[dot+1:colon])
+            if not 0 <= ms < 1000:
+                raise ValueError(line)
+            space = line.index(' ', colon+2)
+            canId = int(line[colon+2:space], 16)
+            #29 bits is the widest CAN ID, so a wider one is a corrupt line
+            if canId > 0x1FFFFFFF:
+                raise ValueError(line)
+            #int() ignores the trailing space and carriage return around the 8 data bytes
+            payload = int(line[space+1:space+24].replace(' ', ''), 16)
+        except ValueError:
+            self.malformed += 1
+            return None
+        return self.secondUs + ms*1000, canId, payload
+
+    @staticmethod
+    def prefix2us(prefix):
+        date, clock = prefix.split(' ')
+        month, day, year = date.split('/')
+        hour, minute, second = clock.split(':')
+        return datetime2us(datetime(int(year), int(month), int(day), int(hour), int(minute), int(second)))
+
+    def report(self):
+        report = '%d lines parsed, %d malformed lines skipped' % (self.lines, self.malformed)
+        if self.filtered:
+            report += ', %d filtered out' % self.filtered
+        return report
+
+#yields the lines of a file object while holding at most one bufferSize chunk in memory
+def read_lines(infile, bufferSize=1<<20):
+    carry = ''
+    while True:
+        chunk = infile.read(bufferSize)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            chunk = chunk.decode('latin-1')
+        lines = (carry + chunk).split('\n')
+        carry = lines.pop()
+        for line in lines:
+            yield line
+    if carry:
+        yield carry
+
+#decodes a stream of log lines one frame at a time, dropping malformed lines
+def decode_lines(lines, pipeline):
+    parse = pipeline.parse
+    for line in lines:
+        frame = parse(line)
+        if frame is not None:
+            yield frame
+
+#drains decoded frames into the buffered writer
+def ingest(frames, pipeline):
+    send, checkpointer = pipeline.send, pipeline.checkpointer
+    for timestamp, dataGroup, signals in frames:
+        send(timestamp, dataGroup, signals)
+        if checkpointer is not None:
+            checkpointer.tick()
+
+#NumPy engine: frames are gathered into columns and every signal of an ID is decoded
+#with one vectorized shift/mask/scale/offset over all frames of that ID
+####################################################################################
+#yields chunks of up to chunkFrames frames as (int64 epoch microseconds, uint32 IDs, uint64 payloads)
+#the IDs are 32 bits wide so 29-bit extended IDs reach the Unknown path like in the rows engine
+#split is the frame parser stage of the pipeline, so --stats sees every line
+def read_columns(lines, split, chunkFrames=1<<20):
+    frames = []
+    for line in lines:
+        frame = split(line)
+        if frame is not None:
+            frames.append(frame)
+            if len(frames) >= chunkFrames:
+                yield frames2columns(frames)
+                frames = []
+    if frames:
+        yield frames2columns(frames)
+
+def frames2columns(frames):
+    timestamps, ids, payloads = zip(*frames)
+    return np.array(timestamps, np.int64), np.array(ids, np.uint32), np.array(payloads, np.uint64)
+
+#returns one (group, signal name, timestamps, values) entry per decoded signal
+#values stay uint64 for unscaled fields, are int64 for whole-number scale and offset and
+#float64 otherwise, so they match the Python numbers of the rows engine
+def decode_columns(timestamps, ids, payloads):
+    columns = []
+    if not len(ids):
+        return columns
+    order = np.argsort(ids, kind='stable')
+    sortedIds = ids[order]
+    bounds = np.flatnonzero(np.diff(sortedIds)) + 1
+    for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(ids)]))):
+        canId = int(sortedIds[start])
+        rows = order[start:end]
+        stamps = timestamps[rows]
+        data = payloads[rows]
+        plan = DECODE_PLANS.get(canId)
+        if plan is None:
+            columns.append((UNKNOWN, '%03X' % canId, stamps, data))
+            continue
+        group, signals = plan
+        for name, shift, mask, scale, offset in signals:
+            values = (data >> np.uint64(shift)) & np.uint64(mask)
+            if isinstance(scale, float) or isinstance(offset, float):
+                values = values * float(scale) + offset
+            elif scale != 1 or offset != 0:
+                values = values.astype(np.int64) * scale + offset
+            columns.append((group, name, stamps, values))
+    return columns
+
+####################################################################################
+
+#Parallel parsing: the decompressed log is cut into newline-aligned byte ranges that a
+#process pool parses independently, dropping the lines the selection rules out; every
+#range comes back as its frames packed in .canraw records, which pickle to a fraction
+#of the decoded signal lists, and is decoded by the pipeline of the parent like a block
+#of a raw archive; ranges are consumed in range order, which is file and therefore
+#timestamp order, with at most two ranges per worker in flight
+####################################################################################
+#copies an archive member to a temporary file so it can be read by byte range
+def extract_member(infile, bufferSize=1<<20):
+    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as outfile:
+        shutil.copyfileobj(infile, outfile, bufferSize)
+    return outfile.name
+
+def split_ranges(size, rangeBytes):
+    return [(start, min(start+rangeBytes, size)) for start in range(0, size, rangeBytes)]
+
+#parses the lines that start inside [start, end) of the file at path
+#returns the packed frames and the parsed, malformed and filtered line counts
+def parse_range(job):
+    path, start, end, selection = job
+    with open(path, 'rb') as infile:
+        if start:
+            #the line straddling start belongs to the previous range
+            infile.seek(start-1)
+            infile.readline()
+        data = infile.read(max(end - infile.tell(), 0))
+        if data and not data.endswith(b'\n'):
+            data += infile.readline()
+    lines = data.decode('latin-1').split('\n')
+    if not lines[-1]:
+        lines.pop()
+    parser = FrameParser()
+    if selection is not None:
+        lines = selection.lines(lines, parser)
+    parse, pack = parser.parse, RAW_FRAME.pack
+    records = []
+    for line in lines:
+        frame = parse(line)
+        if frame is not None:
+            records.append(pack(*frame))
+    return b''.join(records), parser.lines, parser.malformed, parser.filtered
+
+#yields the packed frames of every range of the file at path in file order, adding the
+#line counts of the ranges to frameParser
+def parse_parallel(path, frameParser, selection, workers, rangeBytes=32<<20):
+    pool = multiprocessing.Pool(workers)
+    try:
+        pending = deque()
+        for start, end in split_ranges(os.path.getsize(path), rangeBytes):
+            pending.append(pool.apply_async(parse_range, ((path, start, end, selection),)))
+            if len(pending) >= 2*workers:
+                yield collect_range(pending.popleft(), frameParser)
+        while pending:
+            yield collect_range(pending.popleft(), frameParser)
+    finally:
+        pool.terminate()
+        pool.join()
+
+def collect_range(result, frameParser):
+    records, lines, malformed, filtered = result.get()
+    frameParser.lines += lines
+    frameParser.malformed += malformed
+    frameParser.filtered += filtered
+    return records
+
+####################################################################################
+
+#Dictionary-encoded layout: can_samples rows carry a small signal_id from the signals
+#table instead of the group and signal name strings; --setup --schema encoded renames the
+#original can_data table to can_data_text once and replaces it with a UNION ALL view over
+#both tables, so queries against can_data still see every row; the view cannot be
+#inserted into, so the text schema writes to can_data_text from then on
+#MySQL materializes a UNION view unless it pushes the WHERE of a query into each branch
+#(derived condition pushdown, 8.0.29 and later); without that a name lookup on can_data
+#reads both tables whole, so --setup checks the plan of the view before renaming anything
+#and leaves can_data alone when it would be materialized
+####################################################################################
+CAN_DATA_TYPE = "SELECT table_type FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'can_data'"
+
+ENCODED_TABLES = (
+    """CREATE TABLE IF NOT EXISTS signals (
+    signal_id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    data_group VARCHAR(64) NOT NULL,
+    name VARCHAR(64) NOT NULL,
+    UNIQUE KEY (data_group, name))""",
+    """CREATE TABLE IF NOT EXISTS can_samples (
+    signal_id SMALLINT UNSIGNED NOT NULL,
+    ts DATETIME(3) NOT NULL,
+    value DOUBLE,
+    load_id INT UNSIGNED,
+    KEY (signal_id, ts),
+    KEY (load_id))""")
+
+#every (group, signal name) the catalog can produce, in catalog order
+def catalog_signals():
+    return [(group, signal[0]) for canId, (group, signals) in sorted(DECODE_PLANS.items()) for signal in signals]
+
+#creates the encoded tables and registers the catalog signals; loads need the can_data
+#view that only --setup installs
+def setup_encoded(curs):
+    for statement in ENCODED_TABLES:
+        curs.execute(statement)
+    curs.executemany("INSERT IGNORE INTO signals (data_group, name) VALUES (%s,%s)", catalog_signals())
+    if text_table(curs) != 'can_data_text':
+        raise RuntimeError('can_data is not the encoded view yet, run once with --setup --schema encoded')
+
+#the one-time move of can_data behind the view: the view is first created under a probe
+#name over the current can_data table, and the rename is refused while a name lookup on
+#it would scan can_samples
+def migrate_encoded(curs):
+    for statement in ENCODED_TABLES:
+        curs.execute(statement)
+    curs.executemany("INSERT IGNORE INTO signals (data_group, name) VALUES (%s,%s)", catalog_signals())
+    curs.execute(CAN_DATA_TYPE)
+    found = curs.fetchall()
+    if found and found[0][0] == 'VIEW':
+        return
+    if not found:
+        curs.execute("CREATE TABLE can_data (data_group VARCHAR(64), name VARCHAR(64), ts DATETIME(3), value DOUBLE)")
+    create_view(curs, 'can_data_probe', 'can_data')
+    try:
+        materialized = view_materialized(curs, 'can_data_probe')
+    finally:
+        curs.execute("DROP VIEW can_data_probe")
+    if materialized:
+        raise RuntimeError('this MySQL materializes UNION views (derived condition pushdown needs 8.0.29 or later), '
+                           'so name lookups on a can_data view would read every table whole; can_data was left as it is')
+    curs.execute("RENAME TABLE can_data TO can_data_text")
+    create_view(curs, 'can_data', 'can_data_text')
+
+#UNION ALL view of the encoded rows and textTable under the column names of textTable
+def create_view(curs, view, textTable):
+    curs.execute("SHOW COLUMNS FROM %s" % textTable)
+    columns = tuple('`%s`' % row[0] for row in curs.fetchall()[:4])
+    curs.execute("CREATE VIEW %s AS " % view +
+                 "SELECT s.data_group AS %s, s.name AS %s, d.ts AS %s, d.value AS %s "
+                 "FROM can_samples d JOIN signals s ON s.signal_id = d.signal_id " % columns +
+                 "UNION ALL SELECT %s, %s, %s, %s FROM " % columns + textTable)
+
+#whether a name lookup on the view scans can_samples instead of using its signal_id key
+def view_materialized(curs, view):
+    curs.execute("SHOW COLUMNS FROM %s" % view)
+    nameColumn = curs.fetchall()[1][0]
+    curs.execute("EXPLAIN SELECT * FROM %s WHERE `%s` = %%s" % (view, nameColumn), (catalog_signals()[0][1],))
+    plan = [dict(zip(curs.column_names, row)) for row in curs.fetchall()]
+    return any(step['table'] == 'd' and not step['key'] for step in plan)
+
+#table the text schema writes to: can_data, or can_data_text once can_data is the view
+def text_table(curs):
+    curs.execute(CAN_DATA_TYPE)
+    found = curs.fetchall()
+    return 'can_data_text' if found and found[0][0] == 'VIEW' else 'can_data'
+
+#in-memory (group, signal name) -> signal_id cache loaded from the signals table
+#signals outside the catalog (unknown IDs) are registered on first sight on an
+#autocommit connection of their own, so concurrent jobs never wait on each other
+class SignalIds(dict):
+    def __init__(self, connect):
+        dict.__init__(self)
+        self.conn = connect()
+        self.conn.autocommit = True
+        self.curs = self.conn.cursor()
+        self.curs.execute("SELECT data_group, name, signal_id FROM signals")
+        for dataGroup, name, signalId in self.curs.fetchall():
+            self[dataGroup, name] = signalId
+
+    def __missing__(self, key):
+        self.curs.execute("INSERT IGNORE INTO signals (data_group, name) VALUES (%s,%s)", key)
+        self.curs.execute("SELECT signal_id FROM signals WHERE data_group = %s AND name = %s", key)
+        self[key] = signalId = self.curs.fetchall()[0][0]
+        return signalId
+
+    def close(self):
+        self.curs.close()
+        self.conn.close()
+
+####################################################################################
+
+#Wide layout: one table per decoder group with one column per signal, so a frame is one
+#row; the table definitions and per-ID insert statements are generated from the catalog
+####################################################################################
+WIDE_PREFIX = 'wide_'
+
+#SQL column type that holds every value a catalog signal can decode to
+def sqltype(mask, scale, offset):
+    if isinstance(scale, float) or isinstance(offset, float):
+        return 'DOUBLE'
+    low, high = sorted((offset, mask*scale + offset))
+    if high >= 1<<63:
+        return 'BIGINT UNSIGNED'
+    for name, bits in (('TINYINT', 8), ('SMALLINT', 16), ('INT', 32)):
+        if -(1<<(bits-1)) <= low and high < 1<<(bits-1):
+            return name
+    return 'BIGINT'
+
+#CREATE TABLE statements for every group, columns in catalog order
+def wide_tables():
+    columns = {}
+    for canId, (group, signals) in sorted(DECODE_PLANS.items()):
+        columns.setdefault(group, []).extend('`%s` %s' % (name, sqltype(mask, scale, offset))
+                                             for name, shift, mask, scale, offset in signals)
+    columns[UNKNOWN] = ['value BIGINT UNSIGNED']
+    return ["CREATE TABLE IF NOT EXISTS %s%s (ts DATETIME(3) NOT NULL, can_id INT UNSIGNED NOT NULL, %s, "
+            "load_id INT UNSIGNED, KEY (ts), KEY (can_id, ts), KEY (load_id))" % (WIDE_PREFIX, group, ', '.join(groupColumns))
+            for group, groupColumns in sorted(columns.items())]
+
+#wide tables by name, the unknown IDs' included
+def wide_table_names():
+    return [WIDE_PREFIX + group for group in sorted(set(group for group, signals in DECODE_PLANS.values()) | set([UNKNOWN]))]
+
+def wide_insert(group, canId, names, loadValue='NULL'):
+    return 'INSERT INTO %s%s (ts, can_id, %s, load_id) VALUES (%%s, %d, %s, %s)' % (
+        WIDE_PREFIX, group, ', '.join('`%s`' % name for name in names), canId, ', '.join(['%s']*len(names)), loadValue)
+
+#first signal name -> insert of the rows of its ID; signal names are unique across the
+#catalog, so the first signal of a frame names its insert
+def wide_inserts(loadValue):
+    return dict((signals[0][0], wide_insert(group, canId, [signal[0] for signal in signals], loadValue))
+                for canId, (group, signals) in DECODE_PLANS.items())
+
+def setup_wide(curs):
+    for statement in wide_tables():
+        curs.execute(statement)
+
+#SQLWriter for (first signal name, row) pairs that sends each ID's rows to its own insert
+class WideSQLWriter(SQLWriter):
+    def __init__(self, curs, batchSize=5000, flushInterval=5.0, verbose=False, table=None, loadId=None):
+        SQLWriter.__init__(self, curs, batchSize, flushInterval, verbose, table, loadId)
+        self.inserts = wide_inserts(self.loadValue)
+
+    def execute(self, curs, rows):
+        batches = {}
+        for key, row in rows:
+            batches.setdefault(key, []).append(row)
+        for key, batch in batches.items():
+            insert = self.inserts.get(key)
+            if insert is None:
+                insert = wide_insert(UNKNOWN, int(key, 16), ['value'], self.loadValue)
+            curs.executemany(insert, batch)
+
+class ThreadedWideSQLWriter(ThreadedSQLWriter, WideSQLWriter):
+    def __init__(self, connect, threads=1, queueBatches=8, batchSize=5000, flushInterval=5.0, verbose=False,
+                 table=None, loadId=None):
+        ThreadedSQLWriter.__init__(self, connect, threads, queueBatches, batchSize, flushInterval, verbose, table, loadId)
+        self.inserts = wide_inserts(self.loadValue)
+####################################################################################
+
+#Deadband: with --deadband a sample is only stored when it moved more than the threshold
+#of its signal class since the last stored sample of that signal, or when --heartbeat
+#seconds have passed since then; unknown IDs are always stored
+####################################################################################
+#signal classes in match order, each with a test on (name, width, scale) and its default
+#threshold in the signal's own unit; a threshold of 0 stores every change
+DEADBAND_CLASSES = (
+    ('flag', lambda name, width, scale: scale == 1 and width <= 3, 0),
+    ('voltage', lambda name, width, scale: 'Volt' in name or '_U_' in name, 0.0005),
+    ('temperature', lambda name, width, scale: 'Temp' in name or '_Te_' in name, 0.1),
+    ('soc', lambda name, width, scale: 'soc' in name.lower(), 0.01),
+    ('current', lambda name, width, scale: 'Current' in name or '_I_' in name, 0),
+    ('other', lambda name, width, scale: True, 0),
+)
+
+#signal name -> deadband class for every catalog signal
+def deadband_classes():
+    classes = {}
+    for group, signals in DECODE_PLANS.values():
+        for name, shift, mask, scale, offset in signals:
+            classes[name] = next(cls for cls, test, default in DEADBAND_CLASSES
+                                 if test(name, mask.bit_length(), scale))
+    return classes
+
+#last stored (timestamp, value) of every signal of one session, keyed by signal name,
+#which is unique across the catalog
+class Deadband(object):
+    def __init__(self, thresholds, heartbeat=60.0):
+        #scaled values carry float noise, so a move of exactly the threshold stays inside it
+        self.thresholds = dict((name, thresholds[cls] + 1e-9 if thresholds[cls] else 0)
+                               for name, cls in deadband_classes().items())
+        self.heartbeatUs = int(heartbeat*1000000)
+        self.last = {}
+        self.seen = 0
+        self.suppressed = 0
+
+    #the signals of one frame that have to be stored
+    def filter(self, timestamp, signals):
+        kept = []
+        for key, val in signals:
+            last = self.last.get(key)
+            if last is None or abs(val - last[1]) > self.thresholds[key] or timestamp - last[0] >= self.heartbeatUs:
+                self.last[key] = (timestamp, val)
+                kept.append((key, val))
+        self.seen += len(signals)
+        self.suppressed += len(signals) - len(kept)
+        return kept
+
+    def report(self):
+        return 'deadband suppressed %d of %d rows (%.1f%%)' % (
+            self.suppressed, self.seen, 100.0*self.suppressed/self.seen if self.seen else 0)
+
+#class name -> threshold from the defaults and CLASS=VALUE overrides
+def deadband_thresholds(overrides):
+    thresholds = dict((cls, default) for cls, test, default in DEADBAND_CLASSES)
+    for override in overrides or ():
+        cls, value = override.split('=')
+        thresholds[cls] = float(value)
+    return thresholds
+
+def make_decode_cache(args):
+    if not args.decode_cache:
+        return None
+    if args.cache_group:
+        canIds = include_ids(args.cache_group)
+    else:
+        canIds = [canId for canId, (group, signals) in DECODE_PLANS.items() if group not in CACHE_BYPASS_GROUPS]
+    return DecodeCache(args.decode_cache, canIds)
+
+def make_deadband(args):
+    if not args.deadband:
+        return None
+    return Deadband(deadband_thresholds(args.deadband_threshold), args.heartbeat)
+
+####################################################################################
+
+#Rollups: with --rollups every signal is also aggregated into 1 s, 10 s, 1 min and
+#10 min buckets while it is decoded, and min/max/mean/last/count per bucket are written
+#to one can_rollup_<level> table per level for zoomed-out charts; only the 1 s buckets
+#see single samples, every closed bucket is folded into the open bucket one level up
+#buckets are upserted per load, so rows flushed in parts (checkpoints, live batches) merge
+#into one row per bucket and load; a bucket that two members share has a row of each
+#load, which queries combine by (data_group, name, ts)
+####################################################################################
+ROLLUP_LEVELS = (('1s', 1), ('10s', 10), ('1m', 60), ('10m', 600))
+ROLLUP_PREFIX = 'can_rollup_'
+
+ROLLUP_TABLE = """CREATE TABLE IF NOT EXISTS %s%s (
+    data_group VARCHAR(64) NOT NULL,
+    name VARCHAR(64) NOT NULL,
+    ts DATETIME(3) NOT NULL,
+    min_value DOUBLE NOT NULL,
+    max_value DOUBLE NOT NULL,
+    mean_value DOUBLE NOT NULL,
+    last_value DOUBLE NOT NULL,
+    last_ts DATETIME(3) NOT NULL,
+    samples INT UNSIGNED NOT NULL,
+    load_id INT UNSIGNED NOT NULL,
+    PRIMARY KEY (data_group, name, ts, load_id))"""
+
+#MySQL evaluates the assignments left to right, so mean and last read samples and
+#last_ts before they are updated
+ROLLUP_UPSERT = """INSERT INTO %s%s VALUES (%%s,%%s,%%s,%%s,%%s,%%s,%%s,%%s,%%s,%s) ON DUPLICATE KEY UPDATE
+    min_value = LEAST(min_value, VALUES(min_value)),
+    max_value = GREATEST(max_value, VALUES(max_value)),
+    mean_value = (mean_value*samples + VALUES(mean_value)*VALUES(samples))/(samples + VALUES(samples)),
+    last_value = IF(VALUES(last_ts) >= last_ts, VALUES(last_value), last_value),
+    last_ts = GREATEST(last_ts, VALUES(last_ts)),
+    samples = samples + VALUES(samples)"""
+
+SQLITE_ROLLUP_UPSERT = """INSERT INTO %s%s VALUES (?,?,?,?,?,?,?,?,?,%s) ON CONFLICT (data_group, name, ts, load_id) DO UPDATE SET
+    min_value = min(min_value, excluded.min_value),
+    max_value = max(max_value, excluded.max_value),
+    mean_value = (mean_value*samples + excluded.mean_value*excluded.samples)/(samples + excluded.samples),
+    last_value = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_value ELSE last_value END,
+    last_ts = max(last_ts, excluded.last_ts),
+    samples = samples + excluded.samples"""
+
+#SQLite takes no index definitions inside CREATE TABLE, there the load_id index is created on its own
+def setup_rollups(curs, sqlite=False):
+    for level, seconds in ROLLUP_LEVELS:
+        table = ROLLUP_PREFIX + level
+        if sqlite:
+            curs.execute(ROLLUP_TABLE % (ROLLUP_PREFIX, level))
+            curs.execute('CREATE INDEX IF NOT EXISTS %s_load ON %s (load_id)' % (table, table))
+        else:
+            curs.execute((ROLLUP_TABLE % (ROLLUP_PREFIX, level))[:-1] + ', KEY (load_id))')
+
+#SQLWriter for (level index, row) pairs that upserts each level into its own table
+class RollupWriter(SQLWriter):
+    UPSERT = ROLLUP_UPSERT
+
+    def execute(self, curs, rows):
+        batches = {}
+        for level, row in rows:
+            batches.setdefault(level, []).append(row)
+        for level, batch in sorted(batches.items()):
+            curs.executemany(self.UPSERT % (ROLLUP_PREFIX, ROLLUP_LEVELS[level][0], self.loadValue), batch)
+
+#RollupWriter on the connection of the SQLite sink, a transaction per batch
+class SQLiteRollupWriter(RollupWriter):
+    UPSERT = SQLITE_ROLLUP_UPSERT
+
+    def __init__(self, conn, batchSize=5000, flushInterval=5.0, verbose=False, loadId=None):
+        self.conn = conn
+        with conn:
+            setup_rollups(conn, True)
+        RollupWriter.__init__(self, conn.cursor(), batchSize, flushInterval, verbose, loadId=loadId)
+
+    def execute(self, curs, rows):
+        with self.conn:
+            RollupWriter.execute(self, curs, rows)
+
+#open [start, min, max, sum, count, last, last timestamp] bucket of every level for
+#every (group, signal name) of one session, timestamps in epoch microseconds
+class Rollups(object):
+    def __init__(self, writer):
+        self.writer = writer
+        self.widths = [seconds*1000000 for level, seconds in ROLLUP_LEVELS]
+        self.open = {}
+
+    def add(self, timestamp, dataGroup, signals):
+        second = timestamp - timestamp % 1000000
+        for key, val in signals:
+            buckets = self.open.get((dataGroup, key))
+            if buckets is None:
+                self.open[dataGroup, key] = [[second, val, val, val, 1, val, timestamp], None, None, None]
+                continue
+            bucket = buckets[0]
+            if bucket[0] != second:
+                self.close(dataGroup, key, buckets, 0)
+                buckets[0] = [second, val, val, val, 1, val, timestamp]
+                continue
+            if val < bucket[1]:
+                bucket[1] = val
+            elif val > bucket[2]:
+                bucket[2] = val
+            bucket[3] += val
+            bucket[4] += 1
+            if timestamp >= bucket[6]:
+                bucket[5] = val
+                bucket[6] = timestamp
+
+    #folds NumPy columns in with one aggregate per run of samples in the same second
+    def add_columns(self, dataGroup, key, stamps, values):
+        seconds = stamps - stamps % 1000000
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(seconds)) + 1))
+        ends = np.append(starts[1:], len(stamps)) - 1
+        values = values.astype(np.float64)
+        aggregates = zip(seconds[starts].tolist(), np.minimum.reduceat(values, starts).tolist(),
+                         np.maximum.reduceat(values, starts).tolist(), np.add.reduceat(values, starts).tolist(),
+                         (ends - starts + 1).tolist(), values[ends].tolist(), stamps[ends].tolist())
+        buckets = self.open.setdefault((dataGroup, key), [None, None, None, None])
+        for aggregate in aggregates:
+            self.merge(dataGroup, key, buckets, 0, list(aggregate))
+
+    #merges an aggregate that starts inside a bucket of this level into the open bucket
+    def merge(self, dataGroup, key, buckets, level, aggregate):
+        start = aggregate[0] - aggregate[0] % self.widths[level]
+        bucket = buckets[level]
+        if bucket is not None and bucket[0] != start:
+            self.close(dataGroup, key, buckets, level)
+            bucket = None
+        if bucket is None:
+            buckets[level] = [start] + aggregate[1:]
+            return
+        bucket[1] = min(bucket[1], aggregate[1])
+        bucket[2] = max(bucket[2], aggregate[2])
+        bucket[3] += aggregate[3]
+        bucket[4] += aggregate[4]
+        if aggregate[6] >= bucket[6]:
+            bucket[5] = aggregate[5]
+            bucket[6] = aggregate[6]
+
+    #writes the open bucket of a level and folds it into the level above
+    def close(self, dataGroup, key, buckets, level):
+        start, low, high, total, count, last, lastTs = bucket = buckets[level]
+        buckets[level] = None
+        #the columns are DOUBLE, whole 64-bit payloads included
+        self.writer.add([(level, (dataGroup, key, us2datetime(start), float(low), float(high), total/float(count),
+                                  float(last), us2datetime(lastTs), count))])
+        if level + 1 < len(ROLLUP_LEVELS):
+            self.merge(dataGroup, key, buckets, level + 1, bucket)
+
+    #writes every open bucket, lowest level first so each is complete when written
+    def flush(self):
+        for (dataGroup, key), buckets in self.open.items():
+            for level in range(len(ROLLUP_LEVELS)):
+                if buckets[level] is not None:
+                    self.close(dataGroup, key, buckets, level)
+        self.open = {}
+        self.writer.flush()
+
+    def close_all(self):
+        self.flush()
+        self.writer.close()
+
+    def abort(self):
+        self.open = {}
+        self.writer.abort()
+
+def make_rollups(args, curs, writer):
+    if not args.rollups:
+        return None
+    if args.sink == 'sqlite':
+        return Rollups(SQLiteRollupWriter(writer.conn, args.batch_size, args.flush_interval, args.verbose, writer.loadId))
+    return Rollups(RollupWriter(curs, args.batch_size, args.flush_interval, args.verbose, loadId=writer.loadId))
+
+####################################################################################
+
+#Checkpoints: with --commit-frames the load of a member is committed in chunks, each
+#together with the number of log lines it covers and its load, so a rerun of the same
+#content and catalog continues that load after exactly those lines; the last commit of
+#the member deletes its checkpoint, so a row here always means a partial load
+####################################################################################
+CHECKPOINT_TABLE = """CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    archive VARCHAR(255) NOT NULL,
+    member VARCHAR(255) NOT NULL,
+    line_offset BIGINT NOT NULL,
+    load_id INT UNSIGNED NOT NULL,
+    committed DATETIME NOT NULL,
+    PRIMARY KEY (archive, member))"""
+
+#(load_id, line offset) of the checkpointed load of this archive member when its load has
+#key, the (content hash, member, catalog version, selection) of the manifest, else (None, 0)
+def resume_point(curs, archive, key):
+    curs.execute("SELECT c.load_id, c.line_offset FROM ingest_checkpoints c JOIN ingest_manifest m ON m.load_id = c.load_id "
+                 "WHERE c.archive = %s AND c.member = %s AND m.content_hash = %s AND m.catalog_version = %s "
+                 "AND m.selection = %s", (archive, key[1], key[0], key[2], key[3]))
+    found = curs.fetchall()
+    return tuple(found[0]) if found else (None, 0)
+
+class Checkpointer(object):
+    def __init__(self, pipeline, conn, curs, archive, member, commitFrames, loadId, startLine=0):
+        self.pipeline = pipeline
+        self.conn = conn
+        self.curs = curs
+        self.archive = archive
+        self.member = member
+        self.commitFrames = commitFrames
+        self.loadId = loadId
+        self.startLine = startLine
+        self.frames = 0
+
+    def tick(self, frames=1):
+        self.frames += frames
+        if self.frames >= self.commitFrames:
+            self.commit()
+
+    #the frame parser has consumed exactly the lines whose rows are flushed here; the
+    #final commit of the member writes no checkpoint, finish_load has deleted it
+    def commit(self, final=False):
+        pipeline = self.pipeline
+        if pipeline.rollups is not None:
+            pipeline.rollups.flush()
+        pipeline.writer.flush()
+        if not final:
+            self.curs.execute("REPLACE INTO ingest_checkpoints VALUES (%s,%s,%s,%s,%s)",
+                              (self.archive, self.member, self.startLine + pipeline.frameParser.lines, self.loadId,
+                               datetime.now()))
+        if pipeline.stats is not None:
+            pipeline.stats.commit(self.conn)
+        else:
+            self.conn.commit()
+        self.frames = 0
+####################################################################################
+
+#Manifest: members are remembered by their zip CRC-32 and size, member name and catalog
+#version, so reruns skip the fully ingested ones without decompressing anything until the
+#signal catalog changes
+#the SQL sinks keep one ingest_manifest row per load of a member, committed before its
+#first row is written; its load_id tags every row the load stores, and the last
+#transaction of the load deletes the rows and records of every other load of the same
+#content and member and marks it ingested, so a reload (--force, a new catalog, a rerun
+#after a failure) replaces the member's rows in one commit; the local sinks write whole
+#files per member and keep a JSON list of the ingested members instead
+####################################################################################
+CATALOG_VERSION = hashlib.sha1(repr(SIGNAL_CATALOG).encode('ascii')).hexdigest()[:16]
+
+MANIFEST_TABLE = """CREATE TABLE IF NOT EXISTS ingest_manifest (
+    load_id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    content_hash VARCHAR(32) NOT NULL,
+    member VARCHAR(255) NOT NULL,
+    catalog_version CHAR(16) NOT NULL,
+    selection TEXT NOT NULL,
+    archive VARCHAR(255) NOT NULL,
+    frames BIGINT,
+    started DATETIME NOT NULL,
+    ingested DATETIME,
+    KEY (content_hash, member))"""
+
+#the same in the database of the SQLite sink
+SQLITE_MANIFEST_TABLE = """CREATE TABLE IF NOT EXISTS ingest_manifest (
+    load_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL,
+    member TEXT NOT NULL,
+    catalog_version TEXT NOT NULL,
+    selection TEXT NOT NULL,
+    archive TEXT NOT NULL,
+    frames INTEGER,
+    started TEXT NOT NULL,
+    ingested TEXT)"""
+
+#tables of the current MySQL database whose rows carry a load_id
+LOAD_ID_TABLES = """SELECT table_name FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND column_name = 'load_id' AND table_name NOT LIKE 'ingest%'"""
+
+#statement with the %s markers of mysql.connector turned into the ? of sqlite3 for a SQLite conn
+def dialect(conn, statement):
+    return statement.replace('%s', '?') if isinstance(conn, sqlite3.Connection) else statement
+
+def load_id_tables(conn, curs):
+    if isinstance(conn, sqlite3.Connection):
+        curs.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'ingest%' AND name NOT LIKE 'sqlite%'")
+    else:
+        curs.execute(LOAD_ID_TABLES)
+    return [row[0] for row in curs.fetchall()]
+
+#tables the rows of a load with these options go to
+def load_targets(args, curs):
+    if args.schema == 'encoded':
+        tables = ['can_samples']
+    elif args.schema == 'wide':
+        tables = wide_table_names()
+    else:
+        tables = [text_table(curs)]
+    if args.rollups:
+        tables.extend(ROLLUP_PREFIX + level for level, seconds in ROLLUP_LEVELS)
+    return tables
+
+#refuses loads into tables created before rows were tagged with their load
+def check_load_ids(conn, curs, args):
+    tagged = load_id_tables(conn, curs)
+    missing = [table for table in load_targets(args, curs) if table not in tagged]
+    if missing:
+        raise RuntimeError('%s have no load_id column yet, run once with --setup and the same --schema and --rollups'
+                           % ', '.join(missing))
+
+#the --setup part of check_load_ids: adds the column, and for the rollups the primary key
+#that includes it
+def add_load_ids(conn, curs, args):
+    tagged = load_id_tables(conn, curs)
+    for table in load_targets(args, curs):
+        if table in tagged:
+            continue
+        if table.startswith(ROLLUP_PREFIX):
+            curs.execute("ALTER TABLE %s ADD COLUMN load_id INT UNSIGNED NOT NULL DEFAULT 0, DROP PRIMARY KEY, "
+                         "ADD PRIMARY KEY (data_group, name, ts, load_id), ADD KEY (load_id)" % table)
+        else:
+            curs.execute("ALTER TABLE %s ADD COLUMN load_id INT UNSIGNED, ADD KEY (load_id)" % table)
+
+#records a new load of the member with key and commits it, so the load is known even when
+#it fails halfway; returns its load_id
+def begin_load(conn, curs, key, archive):
+    curs.execute(dialect(conn, "INSERT INTO ingest_manifest (content_hash, member, catalog_version, selection, archive, started) "
+                               "VALUES (%s,%s,%s,%s,%s,%s)"), key + (archive, datetime.now()))
+    conn.commit()
+    return curs.lastrowid
+
+#the last statements of a load before its commit: deletes the rows, manifest rows and
+#checkpoint of every earlier load of the same content and member, whatever its catalog or
+#selection, and marks this one ingested with its frame count
+def finish_load(conn, curs, key, loadId, archive, frames):
+    curs.execute(dialect(conn, "SELECT load_id FROM ingest_manifest WHERE content_hash = %s AND member = %s AND load_id <> %s"),
+                 key[:2] + (loadId,))
+    earlier = [row[0] for row in curs.fetchall()]
+    if earlier:
+        where = ' WHERE load_id IN (%s)' % ','.join('%d' % earlierId for earlierId in earlier)
+        for table in load_id_tables(conn, curs):
+            curs.execute('DELETE FROM ' + table + where)
+        curs.execute('DELETE FROM ingest_manifest' + where)
+    if not isinstance(conn, sqlite3.Connection):
+        curs.execute("DELETE FROM ingest_checkpoints WHERE archive = %s AND member = %s", (archive, key[1]))
+    curs.execute(dialect(conn, "UPDATE ingest_manifest SET frames = %s, ingested = %s WHERE load_id = %s"),
+                 (frames, datetime.now(), loadId))
+
+#moves src over dst, which may exist: os.rename does not replace files on Windows and
+#Python 2 has no os.replace, so there the old file is removed first
+def replace_file(src, dst):
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+        return
+    if os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+#the zip central directory already holds a checksum of every member's content, and the
+#index of a raw archive one of the whole file
+def content_hash(archive, member):
+    if archive.endswith(RAW_SUFFIX):
+        index = load_raw_index(archive)
+        return '%08x:%d' % (index['crc'], index['bytes'])
+    with zipfile.ZipFile(archive, 'r') as zipin:
+        info = zipin.getinfo(member)
+    return '%08x:%d' % (info.CRC, info.file_size)
+
+#set of the (content hash, member, catalog version, selection) of the ingested members,
+#read from ingest_manifest on conn for the SQL sinks, whose loads record themselves, and
+#kept in a JSON file next to the output of the CSV and NPZ sinks, which add them here
+#every load of a member replaces the rows of its earlier ones, so a member holds the rows
+#of one selection; the selection of a full load is '', which holds every other one
+class Manifest(object):
+    def __init__(self, conn=None, path=None):
+        self.path = path
+        self.entries = []
+        if conn is not None:
+            curs = conn.cursor()
+            curs.execute(SQLITE_MANIFEST_TABLE if isinstance(conn, sqlite3.Connection) else MANIFEST_TABLE)
+            curs.execute("SELECT content_hash, member, catalog_version, selection FROM ingest_manifest WHERE ingested IS NOT NULL")
+            self.keys = set(tuple(row) for row in curs.fetchall())
+            curs.close()
+        else:
+            if os.path.exists(path):
+                with open(path) as infile:
+                    self.entries = json.load(infile)
+            self.keys = set(manifest_key(entry) for entry in self.entries)
+
+    #whether a load with key would only load again what is stored already
+    def __contains__(self, key):
+        return key in self.keys or key[:3] + ('',) in self.keys
+
+    def add(self, key, archive, frames):
+        self.keys = set(known for known in self.keys if known[:2] != key[:2])
+        self.keys.add(key)
+        self.entries = [entry for entry in self.entries if manifest_key(entry)[:2] != key[:2]]
+        self.entries.append({'content_hash': key[0], 'member': key[1], 'catalog_version': key[2], 'selection': key[3],
+                             'archive': archive, 'frames': frames, 'ingested': datetime.now().isoformat(' ')})
+        with open(self.path + '.tmp', 'w') as outfile:
+            json.dump(self.entries, outfile, indent=1)
+        replace_file(self.path + '.tmp', self.path)
+
+#entries written before selections were recorded are full loads
+def manifest_key(entry):
+    return entry['content_hash'], entry['member'], entry['catalog_version'], entry.get('selection', '')
+
+def manifest_path(args):
+    return os.path.join(args.output, 'manifest.json')
+####################################################################################
+
+#Stats: with --stats every member appends JSON reports to a JSON-lines file, one every
+#--stats-interval seconds and a final one: seconds per pipeline stage, frames, rows and
+#log bytes per arbitration ID and per decoder group, and the IDs outside the catalog
+#the per-frame stages (parse, decode, send) of the rows engine are timed on one frame in
+#--stats-sample and scaled up, everything else is timed exactly; send is the row building
+#and buffering of Pipeline.send, the batch writes it triggers are counted under sql
+#the stages are timed by wrapping those of the Pipeline, so the ingest loops are the
+#same with or without --stats
+####################################################################################
+timer = getattr(time, 'perf_counter', time.time)
+
+#file object wrapper charging reads, zip decompression included, to the read stage
+class TimedReader(object):
+    def __init__(self, infile, stats):
+        self.infile = infile
+        self.stats = stats
+
+    def read(self, size=-1):
+        started = timer()
+        chunk = self.infile.read(size)
+        self.stats.stages['read'] += timer() - started
+        self.stats.bytesRead += len(chunk)
+        return chunk
+
+class Stats(object):
+    STAGES = ('read', 'parse', 'decode', 'send', 'sql', 'commit')
+
+    def __init__(self, pipeline, path, archive, member, interval=60.0, sampleEvery=32):
+        self.pipeline = pipeline
+        self.path = path
+        self.archive = archive
+        self.member = member
+        self.interval = interval
+        self.sampleEvery = sampleEvery
+        self.stages = dict((stage, 0.0) for stage in self.STAGES)
+        #lines and frames of the rows engine timed per stage, to scale the sampled times up
+        self.sampled = 0
+        self.sampledFrames = 0
+        self.splitCountdown = self.decodeCountdown = sampleEvery
+        self.sampledParse = 0.0
+        #the frame last decoded was sampled, so its send is timed too
+        self.sending = False
+        self.frames = {}
+        self.bytes = {}
+        self.bytesRead = 0
+        self.started = time.time()
+        self.lastReport = self.started
+        self.instrument(pipeline)
+
+    #wraps the stages of the pipeline the way TimedReader wraps reads: every frame is
+    #counted per ID, one line in sampleEvery is timed through split and one frame in
+    #sampleEvery through decode and send; NumPy chunks are decoded and sent timed whole
+    def instrument(self, pipeline):
+        split, decode, send = pipeline.split, pipeline.decode, pipeline.send
+        decodeColumns, sendColumns, writer = pipeline.decode_columns, pipeline.send_columns, pipeline.writer
+        stages, frames, logBytes = self.stages, self.frames, self.bytes
+
+        def timed_split(line):
+            self.splitCountdown -= 1
+            if self.splitCountdown:
+                frame = split(line)
+            else:
+                self.splitCountdown = self.sampleEvery
+                started = timer()
+                frame = split(line)
+                self.sampledParse += timer() - started
+                self.sampled += 1
+            if frame is not None:
+                logBytes[frame[1]] = logBytes.get(frame[1], 0) + len(line) + 1
+            return frame
+
+        def timed_decode(canId, data):
+            frames[canId] = frames.get(canId, 0) + 1
+            self.decodeCountdown -= 1
+            if self.decodeCountdown:
+                return decode(canId, data)
+            self.decodeCountdown = self.sampleEvery
+            started = timer()
+            decoded = decode(canId, data)
+            stages['decode'] += timer() - started
+            self.sampledFrames += 1
+            self.sending = True
+            return decoded
+
+        def timed_send(timestamp, dataGroup, signals):
+            if not self.sending:
+                return send(timestamp, dataGroup, signals)
+            self.sending = False
+            started, writing = timer(), writer.writeTime
+            send(timestamp, dataGroup, signals)
+            stages['send'] += timer() - started - (writer.writeTime - writing)
+            if time.time() - self.lastReport >= self.interval:
+                self.report()
+
+        def timed_decode_columns(timestamps, ids, payloads):
+            canIds, counts = np.unique(ids, return_counts=True)
+            for canId, count in zip(canIds.tolist(), counts.tolist()):
+                frames[canId] = frames.get(canId, 0) + count
+            started = timer()
+            columns = decodeColumns(timestamps, ids, payloads)
+            stages['decode'] += timer() - started
+            return columns
+
+        def timed_send_columns(columns):
+            started, writing = timer(), writer.writeTime
+            sendColumns(columns)
+            stages['send'] += timer() - started - (writer.writeTime - writing)
+            if time.time() - self.lastReport >= self.interval:
+                self.report()
+
+        pipeline.split, pipeline.decode, pipeline.send = timed_split, timed_decode, timed_send
+        pipeline.decode_columns, pipeline.send_columns = timed_decode_columns, timed_send_columns
+
+    #yields the items of iterable, charging the time spent producing them to stage
+    #except the reads made meanwhile
+    def timed(self, stage, iterable):
+        iterator = iter(iterable)
+        while True:
+            started, reading = timer(), self.stages['read']
+            item = next(iterator, None)
+            self.stages[stage] += timer() - started - (self.stages['read'] - reading)
+            if item is None:
+                return
+            yield item
+
+    def commit(self, conn):
+        started = timer()
+        conn.commit()
+        self.stages['commit'] += timer() - started
+
+    def summary(self, final=False, status=None):
+        frameParser, writer, decodeCache = self.pipeline.frameParser, self.pipeline.writer, self.pipeline.decodeCache
+        stages = dict(self.stages)
+        #the NumPy engine times its chunk building whole, the sampled splits included
+        if self.sampled and not stages['parse']:
+            stages['parse'] = self.sampledParse*float(frameParser.lines - frameParser.filtered)/self.sampled
+        if self.sampledFrames:
+            decodedFrames = sum(self.frames.values())
+            for stage in ('decode', 'send'):
+                stages[stage] *= float(decodedFrames)/self.sampledFrames
+        stages['sql'] = writer.writeTime
+        ids, groups = {}, {}
+        for canId, frames in sorted(self.frames.items()):
+            plan = DECODE_PLANS.get(canId)
+            dataGroup, signals = (plan[0], len(plan[1])) if plan else (UNKNOWN, 1)
+            entry = {'group': dataGroup, 'frames': frames, 'rows': frames*signals,
+                     'bytes': self.bytes.get(canId)}
+            ids['%03X' % canId] = entry
+            total = groups.setdefault(dataGroup, {'frames': 0, 'rows': 0, 'bytes': 0 if self.bytes else None})
+            total['frames'] += frames
+            total['rows'] += entry['rows']
+            if self.bytes:
+                total['bytes'] += entry['bytes']
+        return {'archive': self.archive, 'member': self.member, 'final': final, 'status': status,
+                'time': datetime.now().isoformat(' '), 'elapsed': round(time.time() - self.started, 3),
+                'lines': frameParser.lines, 'malformed': frameParser.malformed,
+                'filtered': frameParser.filtered, 'bytes_read': self.bytesRead,
+                'frames': sum(self.frames.values()), 'rows_written': writer.rowsWritten,
+                'stages': dict((stage, round(seconds, 4)) for stage, seconds in stages.items()),
+                'ids': ids, 'groups': groups,
+                'unknown_ids': dict((key, entry['frames']) for key, entry in ids.items() if entry['group'] == UNKNOWN),
+                'decode_cache': decodeCache.summary() if decodeCache is not None else None}
+
+    #appends one report as a single line, so concurrent jobs never interleave within one
+    def report(self, final=False, status=None):
+        self.lastReport = time.time()
+        line = json.dumps(self.summary(final, status), sort_keys=True) + '\n'
+        with open(self.path, 'a') as outfile:
+            outfile.write(line)
+####################################################################################
+
+#Selection: --include/--exclude keep or drop decoder groups and hex IDs and --start/--end
+#bound the frame time; a log line is judged on its ID text and date/second prefix before
+#it is parsed, so dropped frames cost neither the full parse nor a decode
+####################################################################################
+#IDs of the decoder groups and hex IDs named, or None for all
+def include_ids(names):
+    if not names:
+        return None
+    canIds = set()
+    for name in names:
+        matched = [canId for canId, (group, signals) in DECODE_PLANS.items() if group == name]
+        canIds.update(matched or [int(name, 16)])
+    return canIds
+
+#'YYYY-MM-DD HH:MM:SS[.ffffff]' as epoch microseconds
+def parse_time(text):
+    try:
+        stamp = datetime.strptime(text, '%Y-%m-%d %H:%M:%S.%f' if '.' in text else '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected YYYY-MM-DD HH:MM:SS[.ffffff], got %s' % text)
+    return datetime2us(stamp)
+
+class Selection(object):
+    def __init__(self, include=None, exclude=None, start=None, end=None):
+        self.include = include_ids(include)
+        self.exclude = include_ids(exclude) or set()
+        self.start = start if start is not None else float('-inf')
+        self.end = end if end is not None else float('inf')
+        self.timed = start is not None or end is not None
+        #ID text of a line -> kept, every frame of an ID spells it the same way
+        self.idTexts = {}
+
+    def keeps_id(self, canId):
+        return (self.include is None or canId in self.include) and canId not in self.exclude
+
+    def keeps(self, timestamp, canId):
+        return self.start <= timestamp <= self.end and self.keeps_id(canId)
+
+    #whether any frame of a .canraw block can be kept, from its index entry
+    def keeps_block(self, block):
+        return (block['first_ts'] <= self.end and block['last_ts'] >= self.start and
+                any(self.keeps_id(int(canId, 16)) for canId in block['ids']))
+
+    #canonical text of the selection, recorded in the manifest with the loads it makes
+    def describe(self):
+        parts = []
+        if self.include is not None:
+            parts.append('include ' + ','.join('%X' % canId for canId in sorted(self.include)))
+        if self.exclude:
+            parts.append('exclude ' + ','.join('%X' % canId for canId in sorted(self.exclude)))
+        if self.start > float('-inf'):
+            parts.append('start ' + us2datetime(self.start).isoformat(' '))
+        if self.end < float('inf'):
+            parts.append('end ' + us2datetime(self.end).isoformat(' '))
+        return '; '.join(parts)
+
+    #boolean mask of the kept frames of NumPy columns
+    def mask(self, timestamps, ids):
+        keep = (timestamps >= self.start) & (timestamps <= self.end)
+        if self.include is not None:
+            keep &= np.isin(ids, sorted(self.include))
+        if self.exclude:
+            keep &= ~np.isin(ids, sorted(self.exclude))
+        return keep
+
+    #passes on the lines that may hold a kept frame, counting the others as parsed and
+    #filtered by frameParser; lines that do not split like a frame go on for the parser to
+    #reject, and the None of a caught-up tail is passed through
+    #the millisecond field is only read in the seconds that straddle --start or --end
+    def lines(self, lines, frameParser):
+        idTexts, keepsId = self.idTexts, self.keeps_id
+        start, end, timed = self.start, self.end, self.timed
+        prefix, secondUs = None, None
+        for line in lines:
+            if line is None:
+                yield line
+                continue
+            dot = line.find('.')
+            colon = line.find(': ', dot)
+            space = line.find(' ', colon+2)
+            if dot < 0 or colon < 0 or space < 0:
+                yield line
+                continue
+            text = line[colon+2:space]
+            keep = idTexts.get(text)
+            if keep is None:
+                try:
+                    keep = idTexts[text] = keepsId(int(text, 16))
+                except ValueError:
+                    keep = True
+            if keep and timed:
+                if line[:dot] != prefix:
+                    prefix = line[:dot]
+                    try:
+                        secondUs = FrameParser.prefix2us(prefix)
+                    except ValueError:
+                        secondUs = None
+                if secondUs is None:
+                    pass
+                elif secondUs + 999000 < start or secondUs > end:
+                    keep = False
+                elif secondUs < start or secondUs + 999000 > end:
+                    try:
+                        keep = start <= secondUs + int(line[dot+1:colon])*1000 <= end
+                    except ValueError:
+                        pass
+            if keep:
+                yield line
+            else:
+                frameParser.lines += 1
+                frameParser.filtered += 1
+
+#Selection of the command line, or None when it selects everything
+def make_selection(args):
+    if not (args.include or args.exclude or args.start is not None or args.end is not None):
+        return None
+    return Selection(args.include, args.exclude, args.start, args.end)
+
+#manifest text of the selection of args, '' for a full load
+def selection_text(args):
+    selection = make_selection(args)
+    return selection.describe() if selection is not None else ''
+####################################################################################
+
+#Raw archive: with --raw-archive every parsed frame is also written to
+#<dir>/<session>.canraw as fixed-width little-endian records (int64 epoch microseconds,
+#uint32 ID, uint64 payload) with a <session>.canraw.json index of blocks: byte offset,
+#time range and frame count per ID of each block; a .canraw file given in place of a
+#zip archive is re-decoded from a memory map, skipping the blocks without wanted IDs
+####################################################################################
+RAW_SUFFIX = '.canraw'
+RAW_FORMAT = '<qIQ'
+RAW_FRAME = struct.Struct(RAW_FORMAT)
+RAW_BLOCK_FRAMES = 1 << 16
+#ID type of every record format by the frame_format of the index; archives written
+#before extended IDs were kept have 16-bit IDs and are still read
+RAW_ID_TYPES = {'<qHQ': '<u2', RAW_FORMAT: '<u4'}
+
+#the record layout of a frame format as a NumPy dtype, packed like the struct
+def raw_dtype(frameFormat=RAW_FORMAT):
+    return np.dtype([('ts', '<i8'), ('id', RAW_ID_TYPES[frameFormat]), ('payload', '<u8')])
+
+#appends frames to a .canraw file under a temporary name until the load is closed
+class RawArchive(object):
+    def __init__(self, path, archive, member):
+        self.path = path
+        self.source = [archive, member]
+        self.outfile = open(path + '.tmp', 'wb')
+        self.frames = []
+        self.blocks = []
+        self.offset = 0
+        self.crc = 0
+
+    def add(self, timestamp, canId, payload):
+        self.frames.append((timestamp, canId, payload))
+        if len(self.frames) >= RAW_BLOCK_FRAMES:
+            self.write_block()
+
+    def write_block(self):
+        if not self.frames:
+            return
+        pack = RAW_FRAME.pack
+        data = b''.join([pack(*frame) for frame in self.frames])
+        ids = {}
+        for timestamp, canId, payload in self.frames:
+            ids[canId] = ids.get(canId, 0) + 1
+        stamps = [frame[0] for frame in self.frames]
+        self.blocks.append({'offset': self.offset, 'frames': len(self.frames), 'first_ts': min(stamps),
+                            'last_ts': max(stamps), 'ids': dict(('%03X' % canId, count) for canId, count in ids.items())})
+        self.outfile.write(data)
+        self.crc = zlib.crc32(data, self.crc) & 0xFFFFFFFF
+        self.offset += len(data)
+        self.frames = []
+
+    def close(self):
+        self.write_block()
+        self.outfile.close()
+        index = {'frame_format': RAW_FORMAT, 'frames': self.offset // RAW_FRAME.size, 'bytes': self.offset,
+                 'crc': self.crc, 'source': self.source, 'blocks': self.blocks}
+        with open(self.path + '.json.tmp', 'w') as outfile:
+            json.dump(index, outfile, indent=1)
+        replace_file(self.path + '.tmp', self.path)
+        replace_file(self.path + '.json.tmp', self.path + '.json')
+
+    def abort(self):
+        self.outfile.close()
+        os.remove(self.path + '.tmp')
+
+#FrameParser that also hands every parsed frame to a RawArchive
+class RecordingFrameParser(FrameParser):
+    def __init__(self, raw):
+        FrameParser.__init__(self)
+        self.raw = raw
+
+    def parse(self, line):
+        frame = FrameParser.parse(self, line)
+        if frame is not None:
+            self.raw.add(*frame)
+        return frame
+
+def load_raw_index(path):
+    with open(path + '.json') as infile:
+        return json.load(infile)
+
+#decodes count frames packed with the struct record from byte offset of data through
+#the pipeline, dropping the frames selection rules out
+def send_records(data, record, offset, count, pipeline, selection=None):
+    frameParser, decode, send = pipeline.frameParser, pipeline.decode, pipeline.send
+    if hasattr(record, 'iter_unpack'):
+        frames = record.iter_unpack(memoryview(data)[offset:offset + count*record.size])
+    else:
+        frames = (record.unpack_from(data, at) for at in range(offset, offset + count*record.size, record.size))
+    for timestamp, canId, payload in frames:
+        if selection is not None and not selection.keeps(timestamp, canId):
+            frameParser.filtered += 1
+            continue
+        dataGroup, signals = decode(canId, payload)
+        send(timestamp, dataGroup, signals)
+
+#decodes a NumPy array of raw_dtype records through the pipeline in one chunk
+def send_frame_array(frames, pipeline, selection=None):
+    if selection is not None:
+        kept = frames[selection.mask(frames['ts'], frames['id'])]
+        pipeline.frameParser.filtered += len(frames) - len(kept)
+        frames = kept
+    pipeline.send_columns(pipeline.decode_columns(frames['ts'], frames['id'], frames['payload']))
+
+#decodes the frames of a .canraw file; with a selection, blocks whose index rules out
+#every kept frame are not read at all
+#with --stats the bytes of the blocks read are counted, NumPy block copies are charged to
+#the read stage and the pipeline stages count and time the frames as they do for a log
+def ingest_raw(path, args, pipeline):
+    frameParser, selection, stats = pipeline.frameParser, pipeline.selection, pipeline.stats
+    index = load_raw_index(path)
+    if not index['frames']:
+        return
+    frameFormat = index['frame_format']
+    record = struct.Struct(frameFormat)
+    with open(path, 'rb') as infile:
+        data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for block in index['blocks']:
+                frameParser.lines += block['frames']
+                if selection is not None and not selection.keeps_block(block):
+                    frameParser.filtered += block['frames']
+                    continue
+                if stats is not None:
+                    stats.bytesRead += block['frames']*record.size
+                if args.engine == 'numpy':
+                    started = timer()
+                    #copied out of the map, which cannot be closed while arrays still point into it
+                    frames = np.frombuffer(data, raw_dtype(frameFormat), block['frames'], block['offset']).copy()
+                    if stats is not None:
+                        stats.stages['read'] += timer() - started
+                    send_frame_array(frames, pipeline, selection)
+                else:
+                    send_records(data, record, block['offset'], block['frames'], pipeline, selection)
+        finally:
+            data.close()
+####################################################################################
+
+#Batch ingest: every file member of every archive is one job, loaded in its own
+#connection, optionally across a pool of processes, and tracked in ingest_jobs
+####################################################################################
+JOBS_TABLE = """CREATE TABLE IF NOT EXISTS ingest_jobs (
+    archive VARCHAR(255) NOT NULL,
+    member VARCHAR(255) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    frames BIGINT,
+    malformed BIGINT,
+    signal_rows BIGINT,
+    started DATETIME,
+    seconds DOUBLE,
+    error TEXT,
+    PRIMARY KEY (archive, member))"""
+
+def connect(localInfile=False):
+    if mysql is None:
+        raise RuntimeError('the MySQL sinks need mysql.connector installed')
+    return mysql.connector.connect(user = 'root', password = 'FhVj9ot4', host = '104.154.59.36', port = '3306', database = "amped",
+                                   allow_local_infile = localInfile)
+
+#expands directories (their *.zip files) and glob patterns into archive paths
+def find_archives(patterns):
+    archives = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            archives.extend(sorted(glob.glob(os.path.join(pattern, '*.zip'))))
+        else:
+            archives.extend(sorted(glob.glob(pattern)) or [pattern])
+    return [os.path.abspath(archive) for archive in archives]
+
+#errors of an archive that cannot be listed or hashed, which fail it without stopping the batch
+ARCHIVE_ERRORS = (IOError, OSError, ValueError, zipfile.BadZipfile)
+
+#every file member of each archive, skipping directories and macOS resource forks
+#a raw archive is one job without a member; returns the jobs and (archive, error) of the
+#archives that could not be opened
+def list_jobs(archives):
+    jobs, broken = [], []
+    for archive in archives:
+        if archive.endswith(RAW_SUFFIX):
+            jobs.append((archive, ''))
+            continue
+        try:
+            with zipfile.ZipFile(archive, 'r') as zipin:
+                members = zipin.namelist()
+        except ARCHIVE_ERRORS as e:
+            broken.append((archive, repr(e)))
+            continue
+        jobs.extend((archive, member) for member in members
+                    if not member.endswith('/') and not member.startswith('__MACOSX/'))
+    return jobs, broken
+
+#decodes one open archive member with the engine selected on the command line
+#starting after its first skip lines
+def ingest_member(infile, args, pipeline, skip=0):
+    stats, checkpointer = pipeline.stats, pipeline.checkpointer
+    if stats is not None:
+        infile = TimedReader(infile, stats)
+    if args.workers > 1:
+        ingest_parallel(infile, args, pipeline)
+        return
+    lines = read_lines(infile, args.read_buffer)
+    if skip:
+        lines = islice(lines, skip, None)
+    if pipeline.selection is not None:
+        lines = pipeline.selection.lines(lines, pipeline.frameParser)
+    if args.engine == 'numpy':
+        chunks = read_columns(lines, pipeline.split, args.chunk_frames)
+        if stats is not None:
+            chunks = stats.timed('parse', chunks)
+        for chunk in chunks:
+            pipeline.send_columns(pipeline.decode_columns(*chunk))
+            if checkpointer is not None:
+                checkpointer.tick(len(chunk[0]))
+    else:
+        ingest(decode_lines(lines, pipeline), pipeline)
+
+#decodes one open archive member parsed by --workers processes; with --stats the wait
+#for the pool is the parse stage
+def ingest_parallel(infile, args, pipeline):
+    txtPath = extract_member(infile, args.read_buffer)
+    try:
+        ranges = parse_parallel(txtPath, pipeline.frameParser, pipeline.selection, args.workers, args.range_bytes)
+        if pipeline.stats is not None:
+            ranges = pipeline.stats.timed('parse', ranges)
+        for records in ranges:
+            if args.engine == 'numpy':
+                send_frame_array(np.frombuffer(records, raw_dtype()), pipeline)
+            else:
+                send_records(records, RAW_FRAME, 0, len(records) // RAW_FRAME.size, pipeline)
+    finally:
+        os.remove(txtPath)
+
+#loads one archive member and commits it, returning its ingest_jobs row; key is the
+#(content hash, member, catalog version) of the member
+#the SQL sinks record the load in ingest_manifest on conn, which for the SQLite sink is a
+#connection of its own next to the writer's; a raw archive is always loaded whole, its
+#checkpoints are not resumed
+#any error, opening the connections and outputs included, fails only this member
+def run_job(job):
+    archive, member, key, args = job
+    deadband = make_deadband(args)
+    decodeCache = make_decode_cache(args)
+    started = datetime.now()
+    conn = curs = writer = raw = pipeline = None
+    frameParser = FrameParser()
+    status, error = 'done', None
+    try:
+        loadId, startLine = None, 0
+        if args.sink in MYSQL_SINKS:
+            conn = connect(args.sink == 'load')
+            curs = conn.cursor()
+            if args.commit_frames and not archive.endswith(RAW_SUFFIX):
+                loadId, startLine = resume_point(curs, archive, key)
+        elif args.sink == 'sqlite':
+            conn = sqlite3.connect(args.output, timeout=600)
+            curs = conn.cursor()
+        if conn is not None and loadId is None:
+            loadId = begin_load(conn, curs, key, archive)
+        writer = make_writer(args, curs, archive, member, loadId)
+        if args.raw_archive and not archive.endswith(RAW_SUFFIX):
+            raw = RawArchive(os.path.join(args.raw_archive, session_name(archive, member) + RAW_SUFFIX), archive, member)
+            frameParser = RecordingFrameParser(raw)
+        pipeline = Pipeline(writer, args.schema, make_selection(args), decodeCache, deadband,
+                            make_rollups(args, curs, writer), frameParser=frameParser)
+        if args.schema == 'encoded':
+            pipeline.signalIds = SignalIds(connect)
+        if args.stats:
+            pipeline.stats = Stats(pipeline, args.stats, archive, member, args.stats_interval, args.stats_sample)
+        checkpointer = None
+        if args.commit_frames:
+            checkpointer = pipeline.checkpointer = Checkpointer(pipeline, conn, curs, archive, member, args.commit_frames,
+                                                                loadId, startLine)
+            if startLine:
+                print('%s:%s resuming load %d after line %d' % (archive, member, loadId, startLine), file=sys.stderr)
+        if archive.endswith(RAW_SUFFIX):
+            ingest_raw(archive, args, pipeline)
+        else:
+            with zipfile.ZipFile(archive, 'r') as zipin:
+                with zipin.open(member, 'r') as infile:
+                    ingest_member(infile, args, pipeline, startLine)
+        if raw is not None:
+            raw.close()
+        if pipeline.rollups is not None:
+            pipeline.rollups.close_all()
+        writer.close()
+        if conn is not None:
+            finish_load(conn, curs, key, loadId, archive, frameParser.lines - frameParser.malformed - frameParser.filtered)
+        if checkpointer is not None:
+            checkpointer.commit(True)
+        elif pipeline.stats is not None and conn is not None:
+            pipeline.stats.commit(conn)
+        elif conn is not None:
+            conn.commit()
+    except Exception as e:
+        if raw is not None:
+            raw.abort()
+        if pipeline is not None and pipeline.rollups is not None:
+            pipeline.rollups.abort()
+        if writer is not None:
+            writer.abort()
+        if conn is not None:
+            conn.rollback()
+        status, error = 'failed', repr(e)
+    finally:
+        if pipeline is not None and pipeline.signalIds is not None:
+            pipeline.signalIds.close()
+        if conn is not None:
+            curs.close()
+            conn.close()
+    seconds = (datetime.now() - started).total_seconds()
+    if deadband is not None:
+        print('%s:%s %s' % (archive, member, deadband.report()), file=sys.stderr)
+    if decodeCache is not None:
+        print('%s:%s %s' % (archive, member, decodeCache.report()), file=sys.stderr)
+    if pipeline is not None and pipeline.stats is not None:
+        pipeline.stats.report(True, status)
+    return (archive, member, status, frameParser.lines - frameParser.malformed - frameParser.filtered, frameParser.malformed,
+            writer.rowsWritten if writer is not None else 0, started, seconds, error)
+
+#the --setup step: creates the tables a MySQL load with these options writes to, adds
+#load_id to those that predate it and, for the encoded schema, moves can_data behind the
+#view; loads never rename or alter a table
+def run_setup(args):
+    conn = connect()
     curs = conn.cursor()
-    
-    with zipfile.ZipFile(zipFileName,'r') as zipin:
-        txtFile = zipin.namelist()[0];
-        with zipin.open(txtFile,'r') as infile:
-            [parse_data(line) for line in infile.readlines()]
-    
+    curs.execute(JOBS_TABLE)
+    curs.execute(CHECKPOINT_TABLE)
+    curs.execute(MANIFEST_TABLE)
+    if args.schema == 'encoded':
+        migrate_encoded(curs)
+    elif args.schema == 'wide':
+        setup_wide(curs)
+    if args.rollups:
+        setup_rollups(curs)
+    add_load_ids(conn, curs, args)
     conn.commit()
-    curs.close()
     conn.close()
-    
+
+#runs every job, recording its status in ingest_jobs as it finishes, after recording the
+#(archive, error) of the archives that could not be listed as failed; the local sinks
+#only print the job summaries
+def run_batch(jobs, args, broken=()):
+    conn = curs = None
+    if args.sink in MYSQL_SINKS:
+        conn = connect()
+        curs = conn.cursor()
+        curs.execute(JOBS_TABLE)
+        curs.execute(CHECKPOINT_TABLE)
+        if args.schema == 'encoded':
+            setup_encoded(curs)
+        elif args.schema == 'wide':
+            setup_wide(curs)
+        if args.rollups:
+            setup_rollups(curs)
+        check_load_ids(conn, curs, args)
+        manifest = Manifest(conn=conn)
+    elif args.sink == 'sqlite':
+        loads = sqlite3.connect(args.output, timeout=600)
+        manifest = Manifest(conn=loads)
+        loads.close()
+    else:
+        if not os.path.isdir(args.output):
+            os.makedirs(args.output)
+        manifest = Manifest(path=manifest_path(args))
+    if args.raw_archive and not os.path.isdir(args.raw_archive):
+        os.makedirs(args.raw_archive)
+    failures = [(archive, '', error) for archive, error in broken]
+    keys = {}
+    selection = selection_text(args)
+    for archive, member in jobs:
+        try:
+            keys[archive, member] = (content_hash(archive, member), member, CATALOG_VERSION, selection)
+        except ARCHIVE_ERRORS as e:
+            failures.append((archive, member, repr(e)))
+    jobs = [job for job in jobs if job in keys]
+    for archive, member, error in failures:
+        print('%s:%s failed: %s' % (archive, member, error), file=sys.stderr)
+    skipped = [job for job in jobs if not args.force and keys[job] in manifest]
+    jobs = [job for job in jobs if args.force or keys[job] not in manifest]
+    for archive, member in skipped:
+        print('%s:%s skipped, already ingested with catalog %s' % (archive, member, CATALOG_VERSION), file=sys.stderr)
+    if conn is not None:
+        curs.executemany("REPLACE INTO ingest_jobs (archive, member, status, error) VALUES (%s,%s,'failed',%s)", failures)
+        curs.executemany("REPLACE INTO ingest_jobs (archive, member, status) VALUES (%s,%s,'skipped')", skipped)
+        curs.executemany("REPLACE INTO ingest_jobs (archive, member, status) VALUES (%s,%s,'queued')", jobs)
+        conn.commit()
+    work = [(archive, member, keys[archive, member], args) for archive, member in jobs]
+    if args.jobs > 1:
+        pool = multiprocessing.Pool(args.jobs)
+        results = pool.imap_unordered(run_job, work)
+    else:
+        pool = None
+        results = (run_job(job) for job in work)
+    failed = len(failures)
+    for record in results:
+        if conn is not None:
+            curs.execute("REPLACE INTO ingest_jobs VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)", record)
+            conn.commit()
+        archive, member, status, frames, malformed, rows, started, seconds, error = record
+        failed += status != 'done'
+        if status == 'done' and args.sink in ('csv', 'npz'):
+            manifest.add(keys[archive, member], archive, frames)
+        print('%s:%s %s, %d frames (%d malformed lines), %d rows in %.1fs%s' % (
+            archive, member, status, frames, malformed, rows, seconds, ': ' + error if error else ''), file=sys.stderr)
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if conn is not None:
+        curs.close()
+        conn.close()
+    return failed
+####################################################################################
+
+#Follow mode: --follow tails a plain log file that is still being written, decoding
+#every complete line as it appears and committing in micro-batches, so rows are visible
+#within --max-latency seconds of the line being read
+####################################################################################
+#yields the complete lines appended to the file at path, and None whenever it has
+#caught up with the writer; a partial last line is held back until its newline arrives
+#rotation (path replaced by a new file) and truncation reopen the file from its start
+#once the rest of the old file has been read
+def tail_lines(path, pollInterval=0.1, bufferSize=1<<20):
+    infile = io.open(path, 'rb')
+    inode = os.fstat(infile.fileno()).st_ino
+    carry = ''
+    while True:
+        chunk = infile.read(bufferSize)
+        if chunk:
+            if not isinstance(chunk, str):
+                chunk = chunk.decode('latin-1')
+            lines = (carry + chunk).split('\n')
+            carry = lines.pop()
+            for line in lines:
+                yield line
+            continue
+        yield None
+        time.sleep(pollInterval)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            #between the rename and the creation of the new file
+            continue
+        if stat.st_ino != inode or stat.st_size < infile.tell():
+            rest = infile.read()
+            infile.close()
+            if not isinstance(rest, str):
+                rest = rest.decode('latin-1')
+            lines = (carry + rest).split('\n')
+            carry = ''
+            for line in lines:
+                if line:
+                    yield line
+            infile = io.open(path, 'rb')
+            inode = os.fstat(infile.fileno()).st_ino
+            print('%s reopened after rotation' % path, file=sys.stderr)
+
+#microseconds since the naive epoch on the local clock, the clock the logger stamps lines with
+def now_us():
+    return datetime2us(datetime.now())
+
+#latency of every published micro-batch, from the oldest frame's own timestamp (line
+#written, assumes the logger shares this clock) and from the moment it was read
+class LatencyStats(object):
+    def __init__(self):
+        self.batches = 0
+        self.frameTotal = self.frameMax = 0.0
+        self.readTotal = self.readMax = 0.0
+
+    def add(self, frameLatency, readLatency):
+        self.batches += 1
+        self.frameTotal += frameLatency
+        self.frameMax = max(self.frameMax, frameLatency)
+        self.readTotal += readLatency
+        self.readMax = max(self.readMax, readLatency)
+
+    def report(self):
+        if not self.batches:
+            return 'no batches published'
+        return '%d batches, line written to visible avg %.3fs max %.3fs, read to visible avg %.3fs max %.3fs' % (
+            self.batches, self.frameTotal/self.batches, self.frameMax, self.readTotal/self.batches, self.readMax)
+
+#decodes the lines of a followed log, passing on the None of a caught-up tail
+def decode_tail(lines, pipeline):
+    if pipeline.selection is not None:
+        lines = pipeline.selection.lines(lines, pipeline.frameParser)
+    parse = pipeline.parse
+    for line in lines:
+        if line is None:
+            yield None
+            continue
+        frame = parse(line)
+        if frame is not None:
+            yield frame
+
+#drains a live source of decoded frames until it ends or is interrupted; source is
+#called with the pipeline and returns the frames; None from them means the source has
+#caught up, which publishes the pending micro-batch at once, and while it is still
+#catching up a batch is published after --max-latency seconds
+def run_live(args, name, source):
+    conn = curs = loadId = None
+    #a live source has no content to hash, its load is recorded under an empty one and
+    #never replaced
+    key = ('', name, CATALOG_VERSION, selection_text(args))
+    if args.sink in MYSQL_SINKS:
+        conn = connect(args.sink == 'load')
+        curs = conn.cursor()
+        if args.schema == 'encoded':
+            setup_encoded(curs)
+        elif args.schema == 'wide':
+            setup_wide(curs)
+        if args.rollups:
+            setup_rollups(curs)
+        check_load_ids(conn, curs, args)
+        curs.execute(MANIFEST_TABLE)
+        loadId = begin_load(conn, curs, key, name)
+    elif args.sink == 'sqlite':
+        loads = sqlite3.connect(args.output, timeout=600)
+        loads.execute(SQLITE_MANIFEST_TABLE)
+        loadId = begin_load(loads, loads.cursor(), key, name)
+        loads.close()
+    elif args.sink == 'csv' and not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    writer = make_writer(args, curs, name, '', loadId)
+    #batches are published by the loop below, the writer only splits them by size
+    writer.flushInterval = float('inf')
+    pipeline = Pipeline(writer, args.schema, make_selection(args), make_decode_cache(args), make_deadband(args),
+                        make_rollups(args, curs, writer))
+    if args.schema == 'encoded':
+        pipeline.signalIds = SignalIds(connect)
+    rollups, frameParser, send = pipeline.rollups, pipeline.frameParser, pipeline.send
+    latency = LatencyStats()
+    pendingRead = oldestStamp = None
+    lastReport = time.time()
+    try:
+        for frame in source(pipeline):
+            if frame is not None:
+                send(*frame)
+                if pendingRead is None:
+                    pendingRead, oldestStamp = time.time(), frame[0]
+                    continue
+            if pendingRead is None or (frame is not None and time.time() - pendingRead < args.max_latency):
+                continue
+            writer.flush()
+            if rollups is not None:
+                rollups.writer.flush()
+            if conn is not None:
+                conn.commit()
+            latency.add((now_us() - oldestStamp)/1e6, time.time() - pendingRead)
+            pendingRead = None
+            if args.verbose and time.time() - lastReport >= 10:
+                lastReport = time.time()
+                print('%s, %s' % (frameParser.report(), latency.report()), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if rollups is not None:
+            rollups.close_all()
+        writer.close()
+        if conn is not None:
+            conn.commit()
+            curs.close()
+            conn.close()
+        if pipeline.signalIds is not None:
+            pipeline.signalIds.close()
+    print('%s: %s, %d rows, %s' % (name, frameParser.report(), writer.rowsWritten, latency.report()), file=sys.stderr)
+    if pipeline.deadband is not None:
+        print('%s: %s' % (name, pipeline.deadband.report()), file=sys.stderr)
+    if pipeline.decodeCache is not None:
+        print('%s: %s' % (name, pipeline.decodeCache.report()), file=sys.stderr)
+
+#tails one log until interrupted
+def run_follow(args):
+    run_live(args, args.follow,
+             lambda pipeline: decode_tail(tail_lines(args.follow, args.poll_interval, args.read_buffer), pipeline))
+####################################################################################
+
+#Bus input: --bus receives frames straight from a python-can interface such as
+#socketcan:can0 or virtual:test and hands ID, payload and timestamp to the decoder,
+#with no text log to format and parse in between
+####################################################################################
+#bits on the wire of a standard-ID frame with 8 data bytes, worst-case bit stuffing
+#and the 3 bit interframe space; 1 Mbit/s carries at most about 7400 of them a second
+FRAME_BITS = 135
+
+#opens 'interface:channel' as a python-can bus
+def open_bus(spec):
+    interface, channel = spec.split(':', 1)
+    return can.interface.Bus(channel=channel, interface=interface)
+
+#yields the decoded data frames received on bus, and None whenever timeout seconds pass
+#without one; stops after limit data frames when a limit is given
+#python-can stamps frames in epoch seconds, the log stamps them on the local clock, so
+#the local UTC offset (rounded to the minute) is added to keep both on one time base
+def bus_frames(bus, pipeline, timeout=0.1, limit=None):
+    frameParser, selection, decode = pipeline.frameParser, pipeline.selection, pipeline.decode
+    offsetUs = 60000000*int(round((now_us() - time.time()*1e6)/60e6))
+    received = 0
+    while limit is None or received < limit:
+        msg = bus.recv(timeout)
+        if msg is None:
+            yield None
+            continue
+        frameParser.lines += 1
+        #a CAN FD frame carries up to 64 data bytes, more than the 64-bit payload holds
+        if msg.is_error_frame or msg.is_remote_frame or len(msg.data) > 8:
+            frameParser.malformed += 1
+            continue
+        received += 1
+        timestamp = int(msg.timestamp*1000000) + offsetUs
+        if selection is not None and not selection.keeps(timestamp, msg.arbitration_id):
+            frameParser.filtered += 1
+            continue
+        #the data bytes read as one big-endian number, as the log parser reads their hex
+        #digits, so a short frame decodes the same from either input
+        payload = struct.unpack('>Q', bytes(msg.data).rjust(8, b'\0'))[0]
+        #the catalog holds 11-bit IDs; a 29-bit ID is stored whole under all 8 hex digits
+        #even when its number matches a catalog ID
+        if msg.is_extended_id:
+            yield timestamp, UNKNOWN, [('%08X' % msg.arbitration_id, payload)]
+            continue
+        dataGroup, signals = decode(msg.arbitration_id, payload)
+        yield timestamp, dataGroup, signals
+
+#receives from a bus until interrupted
+def run_bus(args):
+    bus = open_bus(args.bus)
+    try:
+        run_live(args, args.bus.replace(':', '_'), lambda pipeline: bus_frames(bus, pipeline, args.poll_interval))
+    finally:
+        bus.shutdown()
+
+#floods a virtual bus with frames of every catalog ID from a second bus object and
+#times how fast decoding and the selected sink drain them
+def bench_bus(args):
+    sender = open_bus(args.bus)
+    bus = open_bus(args.bus)
+    canIds = sorted(DECODE_PLANS)
+    payload = bytearray(range(1, 9))
+    messages = [can.Message(arbitration_id=canIds[i % len(canIds)], data=payload, is_extended_id=False)
+                for i in range(args.bus_benchmark)]
+    def send():
+        for msg in messages:
+            msg.timestamp = time.time()
+            sender.send(msg)
+    thread = threading.Thread(target=send)
+    thread.daemon = True
+    started = time.time()
+    thread.start()
+    try:
+        run_live(args, args.bus.replace(':', '_'),
+                 lambda pipeline: bus_frames(bus, pipeline, args.poll_interval, args.bus_benchmark))
+    finally:
+        bus.shutdown()
+        sender.shutdown()
+    seconds = time.time() - started
+    rate = args.bus_benchmark/seconds
+    print('%d frames in %.2fs, %d frames/s, %.1fx a fully loaded 1 Mbit/s bus (%d frames/s)' % (
+        args.bus_benchmark, seconds, rate, rate/(1000000.0/FRAME_BITS), 1000000//FRAME_BITS), file=sys.stderr)
+####################################################################################
+
+if __name__ == '__main__':
+    argp = argparse.ArgumentParser(description='Decode archived CAN logs into the can_data table')
+    argp.add_argument('archives', nargs='*',
+                      help='zip archives, directories of zip archives, glob patterns, or .canraw raw archives to re-decode')
+    argp.add_argument('--jobs', type=int, default=1, help='archive members loaded in parallel (default 1)')
+    argp.add_argument('--schema', choices=('text', 'encoded', 'wide'), default='text',
+                      help='store group/signal names in every row, signal_id rows in can_samples behind a can_data view, '
+                           'or one row per frame in a wide_<group> table per decoder group (default text)')
+    argp.add_argument('--sink', choices=('insert', 'load', 'sqlite', 'csv', 'npz'), default='insert',
+                      help='write batches to MySQL with multi-row INSERT or LOAD DATA LOCAL INFILE, '
+                           'to a local SQLite database, to CSV files or to per-session NumPy .npz columns (default insert)')
+    argp.add_argument('--output', help='SQLite database file for --sink sqlite, output directory for --sink csv and npz')
+    argp.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT or LOAD DATA chunk (default 5000)')
+    argp.add_argument('--flush-interval', type=float, default=5.0, help='max seconds a row waits in the buffer (default 5)')
+    argp.add_argument('--read-buffer', type=int, default=1<<20, help='bytes read from the archive at a time (default 1 MiB)')
+    argp.add_argument('--engine', choices=('rows', 'numpy'), default='rows', help='decode frame by frame or in NumPy column chunks (default rows)')
+    argp.add_argument('--chunk-frames', type=int, default=1<<20, help='frames per NumPy chunk (default 1048576)')
+    argp.add_argument('--workers', type=int, default=1, help='parse byte ranges of the log in this many processes (default 1)')
+    argp.add_argument('--range-bytes', type=int, default=32<<20, help='bytes of log per parallel work unit (default 32 MiB)')
+    argp.add_argument('--commit-frames', type=int, default=0,
+                      help='commit every N frames with a checkpoint so a rerun resumes after it (default 0, one commit per member)')
+    argp.add_argument('--writer-threads', type=int, default=0, help='write batches from this many background threads (default 0, write inline)')
+    argp.add_argument('--queue-batches', type=int, default=8, help='batches the background writers may fall behind before decoding blocks (default 8)')
+    argp.add_argument('--follow', metavar='LOG', help='tail a plain log file that is still being written instead of loading archives')
+    argp.add_argument('--max-latency', type=float, default=0.5,
+                      help='with --follow, max seconds a read line waits before its micro-batch is committed (default 0.5)')
+    argp.add_argument('--bus', metavar='INTERFACE:CHANNEL', help='decode frames received on a python-can bus, e.g. socketcan:can0 or virtual:test')
+    argp.add_argument('--bus-benchmark', type=int, metavar='FRAMES', help='with a virtual --bus, send this many frames as fast as possible and report throughput')
+    argp.add_argument('--poll-interval', type=float, default=0.1,
+                      help='with --follow or --bus, seconds between polls of the log or bus once caught up (default 0.1)')
+    argp.add_argument('--deadband', action='store_true',
+                      help='store a sample only when it moved more than its signal class threshold or the heartbeat expired')
+    argp.add_argument('--deadband-threshold', action='append', metavar='CLASS=VALUE',
+                      help='override the threshold of a signal class (%s), repeatable' % ', '.join(
+                          '%s=%g' % (cls, default) for cls, test, default in DEADBAND_CLASSES))
+    argp.add_argument('--heartbeat', type=float, default=60.0, help='with --deadband, max seconds between stored samples of a signal (default 60)')
+    argp.add_argument('--rollups', action='store_true',
+                      help='also write min/max/mean/last/count per signal for 1 s, 10 s, 1 min and 10 min buckets to can_rollup_<level> tables')
+    argp.add_argument('--stats', metavar='PATH', help='append JSON-lines reports of stage times and per-ID/per-group counts to PATH')
+    argp.add_argument('--stats-interval', type=float, default=60.0, help='seconds between periodic --stats reports of a member (default 60)')
+    argp.add_argument('--stats-sample', type=int, default=32, help='time the per-frame stages on one frame in this many (default 32)')
+    argp.add_argument('--raw-archive', metavar='DIR', help='also write the parsed frames of every member to DIR/<session>.canraw')
+    argp.add_argument('--include', action='append', metavar='GROUP|ID',
+                      help='decode only this decoder group or hex ID, repeatable (default every ID)')
+    argp.add_argument('--exclude', action='append', metavar='GROUP|ID', help='skip this decoder group or hex ID, repeatable')
+    argp.add_argument('--start', type=parse_time, help='skip frames before YYYY-MM-DD HH:MM:SS[.ffffff] on the log clock')
+    argp.add_argument('--end', type=parse_time, help='skip frames after YYYY-MM-DD HH:MM:SS[.ffffff] on the log clock')
+    argp.add_argument('--decode-cache', type=int, default=0, metavar='ENTRIES',
+                      help='keep this many decoded (ID, payload) pairs in an LRU cache (default 0, no cache)')
+    argp.add_argument('--cache-group', action='append', metavar='GROUP|ID',
+                      help='cache only this decoder group or hex ID, repeatable (default every group but the cell groups)')
+    argp.add_argument('--force', action='store_true',
+                      help='reload members the manifest lists as already ingested, replacing their stored rows')
+    argp.add_argument('--setup', action='store_true',
+                      help='create the MySQL tables of this --schema and --rollups, moving can_data behind the view '
+                           'for --schema encoded, then exit; run once before the first encoded load')
+    argp.add_argument('-v', '--verbose', action='store_true', help='report rows/s after every flush')
+    args = argp.parse_args()
+    if args.engine == 'numpy' and np is None:
+        argp.error('--engine numpy needs numpy installed')
+    if args.schema == 'wide' and (args.engine == 'numpy' or args.sink == 'load'):
+        argp.error('--schema wide writes frames with the rows engine and INSERT sink')
+    if args.sink == 'npz' and np is None:
+        argp.error('--sink npz needs numpy installed')
+    if args.sink in MYSQL_SINKS and mysql is None:
+        argp.error('--sink %s needs mysql.connector installed' % args.sink)
+    if args.sink not in MYSQL_SINKS:
+        if not args.output:
+            argp.error('--sink %s needs --output' % args.sink)
+        if args.schema != 'text' or args.writer_threads:
+            argp.error('--sink %s writes the text schema without writer threads' % args.sink)
+    if args.commit_frames and (args.sink not in MYSQL_SINKS or args.writer_threads or args.workers > 1):
+        argp.error('--commit-frames needs a MySQL sink written inline by the serial decoder')
+    if args.jobs > 1 and args.workers > 1:
+        argp.error('--jobs and --workers cannot be combined')
+    if args.deadband and (args.engine == 'numpy' or args.schema == 'wide'):
+        argp.error('--deadband filters single samples of the rows engine and text or encoded schema')
+    for override in args.deadband_threshold or ():
+        cls, _, value = override.partition('=')
+        try:
+            float(value)
+        except ValueError:
+            argp.error('--deadband-threshold takes CLASS=VALUE, not %s' % override)
+        if cls not in [name for name, test, default in DEADBAND_CLASSES]:
+            argp.error('unknown deadband class %s' % cls)
+    if args.rollups and args.sink in ('csv', 'npz'):
+        argp.error('--rollups needs a MySQL or SQLite sink')
+    if args.raw_archive and (args.workers > 1 or args.commit_frames or args.follow or args.bus):
+        argp.error('--raw-archive records whole members parsed in-process, without --workers, --commit-frames, --follow or --bus')
+    try:
+        include_ids(args.include)
+        include_ids(args.exclude)
+        include_ids(args.cache_group)
+    except ValueError:
+        argp.error('--include, --exclude and --cache-group take decoder group names or hex IDs')
+    if make_selection(args) is not None and args.raw_archive:
+        argp.error('--include, --exclude, --start and --end cannot be combined with --raw-archive, which records whole members')
+    if args.start is not None and args.end is not None and args.start > args.end:
+        argp.error('--start is after --end')
+    if args.decode_cache and args.engine == 'numpy':
+        argp.error('--decode-cache caches the rows engine, without --engine numpy')
+    if args.stats and (args.follow or args.bus):
+        argp.error('--stats instruments archive loads, without --follow or --bus')
+    if args.stats_sample < 1:
+        argp.error('--stats-sample must be at least 1')
+    if args.follow or args.bus:
+        if args.archives or (args.follow and args.bus):
+            argp.error('--follow and --bus read one live source and take no archives')
+        if args.sink == 'npz' or args.writer_threads or args.commit_frames or args.engine == 'numpy' or args.workers > 1:
+            argp.error('--follow and --bus decode frame by frame and commit their own micro-batches through an inline sink other than npz')
+    if args.bus:
+        if can is None:
+            argp.error('--bus needs python-can installed')
+        if ':' not in args.bus:
+            argp.error('--bus takes INTERFACE:CHANNEL')
+    if args.bus_benchmark and not (args.bus or '').startswith('virtual:'):
+        argp.error('--bus-benchmark needs a virtual --bus')
+    if args.setup and (args.sink not in MYSQL_SINKS or args.archives or args.follow or args.bus):
+        argp.error('--setup prepares the tables of the MySQL sinks and takes no archives or live source')
+    try:
+        if args.setup:
+            run_setup(args)
+            sys.exit(0)
+        if args.follow:
+            run_follow(args)
+            sys.exit(0)
+        if args.bus:
+            (bench_bus if args.bus_benchmark else run_bus)(args)
+            sys.exit(0)
+        if not args.archives:
+            argp.error('no archives given')
+
+        jobs, broken = list_jobs(find_archives(args.archives))
+        if args.raw_archive and any(archive.endswith(RAW_SUFFIX) for archive, member in jobs):
+            argp.error('--raw-archive records zip archives only')
+        sys.exit(1 if run_batch(jobs, args, broken) else 0)
+    except RuntimeError as e:
+        argp.exit(1, '%s: error: %s\n' % (argp.prog, e))